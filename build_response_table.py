@@ -0,0 +1,19 @@
+# Build step for the prebuilt response table served by lambda_function.py
+# Run before packaging and ship response_table.bin next to lambda_function.py
+
+import argparse
+import os
+import time
+
+from lambda_function import PrebuiltResponseTable, RESPONSE_TABLE_PATH
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Precompute responses for symbolic problems with small operands')
+    parser.add_argument('--output', default=RESPONSE_TABLE_PATH, help='Path of the table file to write')
+    parser.add_argument('--max-operand', type=int, default=100, help='Largest operand to precompute')
+    args = parser.parse_args()
+
+    start = time.time()
+    count = PrebuiltResponseTable.build(args.output, args.max_operand)
+    size_mb = os.path.getsize(args.output) / (1024 * 1024)
+    print(f"✅ Wrote {count} problems to {args.output} ({size_mb:.1f} MB) in {time.time() - start:.1f}s")
@@ -2,6 +2,10 @@
 # Enhanced version with API key authentication for production deployment
 # Author: Pioneer AI Academy Intern
 
+# Module initialization start (taken before the imports, which dominate cold start), reported by warmup invocations
+import time
+_MODULE_INIT_STARTED = time.perf_counter()
+
 import json
 import re
 import logging
@@ -11,7 +15,21 @@ import uuid
 import base64
 import hashlib
 import os
+import atexit
+import sqlite3
+import tempfile
+import cProfile
+import pstats
+import tracemalloc
+import ssl
+import mmap
+import struct
+import asyncio
+import threading
+from abc import ABC, abstractmethod
+from collections import Counter, OrderedDict
 from functools import wraps
+from urllib.parse import urlsplit
 
 # Configure logging
 logger = logging.getLogger()
@@ -36,6 +54,48 @@ USER_ROLES = {
     'admin_super_access_2025': {'role': 'admin', 'daily_limit': 10000}
 }
 
+# Request coalescing: followers wait this long for an in-flight leader before computing on their own
+COALESCE_TIMEOUT_SECONDS = float(os.environ.get('COALESCE_TIMEOUT_SECONDS', '2.0'))
+
+# Guidance backend configuration ('rules' = MathProblemSolver only, 'llm' = LLM with rule-based fallback)
+GUIDANCE_BACKEND = os.environ.get('GUIDANCE_BACKEND', 'rules')
+LLM_API_URL = os.environ.get('LLM_API_URL', 'https://api.openai.com/v1/chat/completions')
+LLM_API_KEY = os.environ.get('OPENAI_API_KEY', '')
+LLM_MODEL = os.environ.get('LLM_MODEL', 'gpt-4')
+LLM_DEADLINE_SECONDS = float(os.environ.get('LLM_DEADLINE_SECONDS', '2.5'))
+LLM_HEDGE_DELAY_SECONDS = float(os.environ.get('LLM_HEDGE_DELAY_SECONDS', '0.8'))
+
+# Templated LLM guidance cache size (word problem templates, LRU-evicted)
+TEMPLATE_CACHE_SIZE = int(os.environ.get('TEMPLATE_CACHE_SIZE', '2048'))
+
+# Sampling profiler: profile every Nth invocation (0 = disabled) and dump aggregated stats to PROFILE_SINK_DIR
+PROFILE_EVERY_N = int(os.environ.get('PROFILE_EVERY_N', '0'))
+PROFILE_DUMP_EVERY = int(os.environ.get('PROFILE_DUMP_EVERY', '50'))
+PROFILE_SINK_DIR = os.environ.get('PROFILE_SINK_DIR', '/tmp')
+
+# Scheduled keep-warm pings and direct warmup invocations (never API Gateway events)
+WARMUP_EVENT_SOURCES = ('aws.events', 'serverless-plugin-warmup')
+
+# Per-student progress store (SQLite WAL with write-behind buffering); set PROGRESS_TRACKING=off to disable
+PROGRESS_TRACKING = os.environ.get('PROGRESS_TRACKING', 'on').lower() not in ('off', '0', 'false')
+PROGRESS_DB_PATH = os.environ.get('PROGRESS_DB_PATH', os.path.join(tempfile.gettempdir(), 'homework_progress.db'))
+PROGRESS_FLUSH_SECONDS = float(os.environ.get('PROGRESS_FLUSH_SECONDS', '5.0'))
+PROGRESS_FLUSH_BATCH = int(os.environ.get('PROGRESS_FLUSH_BATCH', '200'))
+PROGRESS_CACHE_SIZE = int(os.environ.get('PROGRESS_CACHE_SIZE', '10000'))
+PROGRESS_RETENTION_DAYS = int(os.environ.get('PROGRESS_RETENTION_DAYS', '180'))
+
+# Prebuilt response table for symbolic problems with small operands (see build_response_table.py)
+RESPONSE_TABLE_PATH = os.environ.get(
+    'RESPONSE_TABLE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'response_table.bin')
+)
+
+def get_api_key(headers) -> Optional[str]:
+    """Extract the API key from request headers (case insensitive)."""
+    for key, value in (headers or {}).items():
+        if key.lower() in ['x-api-key', 'authorization', 'api-key']:
+            return value.replace('Bearer ', '').strip()
+    return None
+
 def verify_api_key(event):
     """
     Verify API key from request headers and return user info.
@@ -46,14 +106,7 @@ def verify_api_key(event):
     Returns:
         Tuple[bool, str, Dict]: (is_valid, message, user_info)
     """
-    headers = event.get('headers', {})
-    
-    # Check for API key in headers (case insensitive)
-    api_key = None
-    for key, value in headers.items():
-        if key.lower() in ['x-api-key', 'authorization', 'api-key']:
-            api_key = value.replace('Bearer ', '').strip()
-            break
+    api_key = get_api_key(event.get('headers', {}))
     
     if not api_key:
         return False, "Missing API key in request headers", {}
@@ -69,10 +122,25 @@ def log_usage(api_key, problem_text, success, user_info):
     """Log usage for monitoring and rate limiting."""
     logger.info(f"Usage: {user_info.get('role', 'unknown')} | Success: {success} | Problem: {problem_text[:50]}...")
 
+def is_warmup_event(event) -> bool:
+    """
+    Recognize keep-warm pings: {"warmup": true} or a scheduled event source.
+    
+    API Gateway proxy events always carry httpMethod and clients cannot set
+    top-level event keys, so warmup cannot be triggered through the API.
+    """
+    if 'httpMethod' in event:
+        return False
+    return event.get('warmup') is True or event.get('source') in WARMUP_EVENT_SOURCES
+
 def require_auth(func):
     """Decorator to require authentication for protected endpoints."""
     @wraps(func)
     def wrapper(event, context):
+        # Skip auth for warmup pings (no user data is returned)
+        if is_warmup_event(event):
+            return func(event, context)
+        
         # Skip auth for OPTIONS requests (CORS preflight)
         if event.get('httpMethod') == 'OPTIONS':
             return func(event, context)
@@ -118,12 +186,205 @@ def require_auth(func):
         return func(event, context)
     return wrapper
 
+class InvocationProfiler:
+    """
+    Opt-in sampling profiler for lambda_handler.
+    
+    Every Nth invocation runs under cProfile with tracemalloc tracing its
+    allocations; tracing is switched on only for sampled invocations, so the
+    rest of the traffic runs at full speed. Stats are aggregated across warm
+    invocations and dumped as .pstats and .json to the sink directory every
+    dump_every profiled invocations. Only one invocation is profiled at a
+    time, and deciding whether to sample never waits on a report or dump.
+    """
+    
+    def __init__(self, every_n: int = PROFILE_EVERY_N, dump_every: int = PROFILE_DUMP_EVERY,
+                 sink_dir: str = PROFILE_SINK_DIR):
+        self.dump_every = max(dump_every, 1)
+        self.sink_dir = sink_dir
+        self.every_n = 0
+        self.invocations = 0
+        self._counter_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._sampling = threading.Lock()
+        self._reset()
+        if every_n > 0:
+            self.start(every_n)
+    
+    def _reset(self):
+        self.profiled = 0
+        self.total_wall_seconds = 0.0
+        self.max_peak_bytes = 0
+        self.total_peak_bytes = 0
+        self._stats = None
+        self._allocations = {}
+    
+    @property
+    def enabled(self) -> bool:
+        return self.every_n > 0
+    
+    def start(self, every_n: int = 1):
+        """Start sampling every Nth invocation, discarding previous stats."""
+        with self._lock:
+            self._reset()
+        with self._counter_lock:
+            self.invocations = 0
+            self.every_n = max(int(every_n), 1)
+        logger.info(f"Profiling enabled: every {self.every_n} invocation(s)")
+    
+    def stop(self) -> Dict[str, any]:
+        """Stop sampling, dump the final stats and return the report."""
+        with self._counter_lock:
+            self.every_n = 0
+        logger.info("Profiling disabled")
+        return self.dump()
+    
+    def _should_sample(self) -> bool:
+        with self._counter_lock:
+            if not self.enabled:
+                return False
+            self.invocations += 1
+            return self.invocations % self.every_n == 0
+    
+    def __call__(self, func):
+        """Decorator that samples invocations of func."""
+        @wraps(func)
+        def wrapper(event, context):
+            if not self._should_sample() or not self._sampling.acquire(blocking=False):
+                return func(event, context)
+            
+            # Trace allocations for this invocation only; if something else is
+            # already tracing, diff snapshots instead of stopping its tracing
+            owns_tracing = not tracemalloc.is_tracing()
+            if owns_tracing:
+                tracemalloc.start()
+                before = None
+            else:
+                before = tracemalloc.take_snapshot()
+            tracemalloc.reset_peak()
+            traced_at_start = tracemalloc.get_traced_memory()[0]
+            
+            profile = cProfile.Profile()
+            start = time.perf_counter()
+            try:
+                profile.enable()
+                return func(event, context)
+            finally:
+                profile.disable()
+                elapsed = time.perf_counter() - start
+                peak_bytes = tracemalloc.get_traced_memory()[1] - traced_at_start
+                after = tracemalloc.take_snapshot()
+                if owns_tracing:
+                    tracemalloc.stop()
+                self._sampling.release()
+                allocations = after.compare_to(before, 'lineno') if before else after.statistics('lineno')
+                self._record(profile, elapsed, peak_bytes, allocations)
+        return wrapper
+    
+    def _record(self, profile: cProfile.Profile, elapsed: float, peak_bytes: int, allocations):
+        with self._lock:
+            if self._stats is None:
+                self._stats = pstats.Stats(profile)
+            else:
+                self._stats.add(profile)
+            for stat in allocations:
+                size = getattr(stat, 'size_diff', stat.size)
+                count = getattr(stat, 'count_diff', stat.count)
+                if size <= 0:
+                    continue
+                frame = stat.traceback[0]
+                location = f"{os.path.basename(frame.filename)}:{frame.lineno}"
+                totals = self._allocations.setdefault(location, [0, 0])
+                totals[0] += size
+                totals[1] += count
+            self.profiled += 1
+            self.total_wall_seconds += elapsed
+            self.total_peak_bytes += peak_bytes
+            self.max_peak_bytes = max(self.max_peak_bytes, peak_bytes)
+            should_dump = self.profiled % self.dump_every == 0
+        
+        if should_dump:
+            self.dump()
+    
+    def report(self, limit: int = 25) -> Dict[str, any]:
+        """Aggregated profile of the sampled invocations as a JSON-serializable dict."""
+        with self._lock:
+            function_stats = list(self._stats.stats.items()) if self._stats is not None else []
+            allocations = list(self._allocations.items())
+            profiled = self.profiled
+            total_wall_seconds = self.total_wall_seconds
+            total_peak_bytes = self.total_peak_bytes
+            max_peak_bytes = self.max_peak_bytes
+        
+        top_functions = []
+        for (filename, line, function), (_, calls, total_time, cumulative_time, _) in sorted(
+                function_stats, key=lambda item: item[1][3], reverse=True)[:limit]:
+            top_functions.append({
+                'function': f"{os.path.basename(filename)}:{line}({function})",
+                'calls': calls,
+                'total_ms': round(total_time * 1000, 3),
+                'cumulative_ms': round(cumulative_time * 1000, 3)
+            })
+        
+        top_allocations = [
+            {'location': location, 'size_bytes': size, 'count': count}
+            for location, (size, count) in sorted(allocations, key=lambda item: item[1][0], reverse=True)[:limit]
+        ]
+        
+        return {
+            'enabled': self.enabled,
+            'every_n': self.every_n,
+            'invocations': self.invocations,
+            'profiled': profiled,
+            'avg_wall_ms': round(total_wall_seconds * 1000 / profiled, 3) if profiled else 0,
+            'avg_peak_alloc_bytes': total_peak_bytes // profiled if profiled else 0,
+            'max_peak_alloc_bytes': max_peak_bytes,
+            'top_functions': top_functions,
+            'top_allocations': top_allocations,
+            'timestamp': datetime.utcnow().isoformat()
+        }
+    
+    def dump(self) -> Dict[str, any]:
+        """Write aggregated stats to the sink directory and return the report."""
+        report = self.report()
+        base_path = os.path.join(self.sink_dir, f"homework-profile-{os.getpid()}")
+        try:
+            os.makedirs(self.sink_dir, exist_ok=True)
+            with self._lock:
+                if self._stats is not None:
+                    self._stats.dump_stats(base_path + '.pstats')
+            with open(base_path + '.json', 'w') as report_file:
+                json.dump(report, report_file, indent=2)
+            report['dumped_to'] = base_path
+        except OSError as e:
+            logger.warning(f"Could not write profile to {self.sink_dir}: {e}")
+        return report
+
+# One profiler per container so stats aggregate across warm invocations
+profiler = InvocationProfiler()
+
 class MathProblemSolver:
     """
     Enhanced core class for analyzing math problems and providing educational hints.
     Now includes user-specific customization based on authentication.
     """
     
+    OPERATIONS = ('addition', 'subtraction', 'multiplication', 'division')
+    
+    # Largest operand for 'easy' and 'medium'; anything bigger is 'hard'. Division is always 'medium'
+    DIFFICULTY_THRESHOLDS = {
+        'addition': (10, 50),
+        'subtraction': (10, 50),
+        'multiplication': (5, 10)
+    }
+    
+    # What repeated struggles mean per operation: the only failed responses are
+    # a subtraction below zero and a division by zero (see _*_hints)
+    STRUGGLE_HINTS = {
+        'subtraction': "slow down and check the order of your numbers - start with the bigger one",
+        'division': "remember that you can never divide by zero - check the second number"
+    }
+    
     def __init__(self, user_role='student'):
         self.user_role = user_role
         
@@ -164,9 +425,13 @@ class MathProblemSolver:
     def extract_numbers(self, text: str) -> List[int]:
         """Extract all numbers from text."""
         numbers = re.findall(r'\b\d+\b', text)
-        max_number = 10000 if self.user_role == 'teacher' else 1000  # Teachers can handle bigger numbers
+        max_number = self.max_number()
         return [int(n) for n in numbers if int(n) <= max_number]
     
+    def max_number(self) -> int:
+        """Largest operand accepted for this user role."""
+        return 10000 if self.user_role == 'teacher' else 1000  # Teachers can handle bigger numbers
+    
     def identify_operation(self, text: str) -> Tuple[str, List[int]]:
         """
         Identify math operation and extract numbers.
@@ -180,6 +445,25 @@ class MathProblemSolver:
         text = text.lower().strip()
         
         # First, try direct pattern matching
+        direct_match = self.match_direct_pattern(text)
+        if direct_match:
+            return direct_match
+        
+        # If no direct pattern, analyze word problems
+        numbers = self.extract_numbers(text)
+        if len(numbers) >= 2:
+            return self._analyze_word_problem(text, numbers)
+        
+        return 'unknown', numbers
+    
+    def match_direct_pattern(self, text: str) -> Optional[Tuple[str, List[int]]]:
+        """
+        Match symbolic or explicitly worded operations like "7 × 8" or "subtract 3 from 9".
+        
+        A direct match is a confident classification; word problems return None.
+        """
+        text = text.lower().strip()
+        
         for operation, patterns in self.patterns.items():
             for pattern in patterns:
                 match = re.search(pattern, text)
@@ -189,12 +473,7 @@ class MathProblemSolver:
                         return operation, [int(match.group(2)), int(match.group(1))]
                     return operation, [int(match.group(1)), int(match.group(2))]
         
-        # If no direct pattern, analyze word problems
-        numbers = self.extract_numbers(text)
-        if len(numbers) >= 2:
-            return self._analyze_word_problem(text, numbers)
-        
-        return 'unknown', numbers
+        return None
     
     def _analyze_word_problem(self, text: str, numbers: List[int]) -> Tuple[str, List[int]]:
         """Analyze word problems based on keywords."""
@@ -233,7 +512,10 @@ class MathProblemSolver:
         
         hints = hint_generators[operation](numbers[0], numbers[1])
         
-        # Customize based on user role
+        return self.apply_role_customization(hints, operation, numbers)
+    
+    def apply_role_customization(self, hints: Dict[str, any], operation: str, numbers: List[int]) -> Dict[str, any]:
+        """Add teacher notes or parent tips to hints based on user role."""
         if self.user_role == 'teacher':
             hints['teacher_notes'] = self._get_teacher_notes(operation, numbers)
         elif self.user_role == 'parent':
@@ -261,6 +543,30 @@ class MathProblemSolver:
         }
         return tips.get(operation, "Encourage your child to explain their thinking process")
     
+    def get_adaptive_hint(self, operation: str, difficulty: str, history: Dict[Tuple[str, str], Tuple[int, int]]) -> Optional[str]:
+        """
+        Generate a hint based on the student's past attempts.
+        
+        Args:
+            operation (str): Type of math operation
+            difficulty (str): Difficulty from _assess_difficulty
+            history (Dict): (operation, difficulty) -> (attempts, struggles)
+            
+        Returns:
+            Optional[str]: Adaptive hint, or None if there is not enough history
+        """
+        attempts, struggles = history.get((operation, difficulty), (0, 0))
+        
+        if struggles >= 2:
+            advice = self.STRUGGLE_HINTS.get(operation, "slow down and check each step")
+            return f"{operation.capitalize()} problems like this have been tricky before - {advice}"
+        if attempts >= 5 and difficulty != 'hard':
+            return f"You've practiced a lot of {difficulty} {operation} - try a harder problem next!"
+        if attempts >= 3 and difficulty == 'hard':
+            return f"Hard {operation} takes practice - break the numbers into tens and ones"
+        
+        return None
+    
     def _addition_hints(self, num1: int, num2: int) -> Dict[str, any]:
         """Generate addition hints with role-based customization."""
         steps = []
@@ -455,23 +761,17 @@ class MathProblemSolver:
     
     def _assess_difficulty(self, num1: int, num2: int, operation: str) -> str:
         """Assess problem difficulty for appropriate hint generation."""
-        if operation in ['addition', 'subtraction']:
-            if max(num1, num2) <= 10:
-                return 'easy'
-            elif max(num1, num2) <= 50:
-                return 'medium'
-            else:
-                return 'hard'
-        
-        elif operation == 'multiplication':
-            if max(num1, num2) <= 5:
-                return 'easy'
-            elif max(num1, num2) <= 10:
-                return 'medium'
-            else:
-                return 'hard'
-        
-        return 'medium'
+        thresholds = self.DIFFICULTY_THRESHOLDS.get(operation)
+        if thresholds is None:
+            return 'medium'
+        
+        easy_max, medium_max = thresholds
+        if max(num1, num2) <= easy_max:
+            return 'easy'
+        elif max(num1, num2) <= medium_max:
+            return 'medium'
+        else:
+            return 'hard'
     
     def _get_abacus_tip(self, operation: str, num1: int, num2: int) -> str:
         """Generate abacus-specific learning tips."""
@@ -652,6 +952,1198 @@ class EducationalResponseGenerator:
         
         return response
 
+class GuidanceBackend(ABC):
+    """
+    Interface for backends that turn a problem into (operation, numbers, hints).
+    
+    Hints must have the same shape as MathProblemSolver.generate_educational_hint
+    so EducationalResponseGenerator can format them unchanged.
+    """
+    
+    name = 'base'
+    
+    @abstractmethod
+    def generate_guidance(self, solver: MathProblemSolver, problem_text: str) -> Tuple[str, List[int], Dict[str, any]]:
+        """Return (operation, numbers, hints) for the problem."""
+    
+    def warm(self):
+        """Open connections or load resources ahead of the first request."""
+
+class RuleBasedGuidanceBackend(GuidanceBackend):
+    """Regex and keyword guidance from MathProblemSolver."""
+    
+    name = 'rules'
+    
+    def generate_guidance(self, solver: MathProblemSolver, problem_text: str) -> Tuple[str, List[int], Dict[str, any]]:
+        operation, numbers = solver.identify_operation(problem_text)
+        return operation, numbers, solver.generate_educational_hint(operation, numbers)
+
+class WordProblemTemplateCache:
+    """
+    Caches LLM guidance for word problems that differ only in names, objects and numbers.
+    
+    "Sarah has 20 candies and gives 5 to Tom" and "Ali has 18 marbles and gives
+    4 to Mia" canonicalize to the same template. The first problem's LLM
+    guidance is stored as a skeleton with its names, objects and operands
+    turned into slots; the second is answered by filling the slots from its
+    own text, without an LLM round-trip. Guidance that mentions any number
+    other than a slot value (a derived total, say) is never cached, so a
+    skeleton cannot carry numbers that would be wrong for another problem.
+    
+    Capitalized words inside a sentence (names) and the plural noun counted
+    by a number become slots. The first word of a sentence is often the verb
+    ("Lost 3 today" vs "Found 3 today"), so it always stays literal, as do
+    lowercase names, which only makes those templates more specific. Words
+    containing a classification keyword never become slots.
+    """
+    
+    TOKEN_PATTERN = re.compile(r'\b(?:\d+|[A-Za-z]+)\b')
+    SENTENCE_END_PATTERN = re.compile(r'[.!?]')
+    NUMBER_PATTERN = re.compile(r'\b\d+\b')
+    SLOT_MARKER_PATTERN = re.compile(r'\x00(\d+)\x00')
+    TEXT_FIELDS = ('strategy', 'abacus_tip', 'mental_math_trick', 'encouragement')
+    
+    # Words ending in 's' after a number that are not a counted plural noun
+    ITEM_STOPWORDS = {
+        'is', 'was', 'has', 'does', 'as', 'us', 'its', 'his', 'this', 'less', 'times',
+        'always', 'sometimes', 'perhaps', 'besides', 'towards', 'afterwards', 'plus', 'minus'
+    }
+    
+    def __init__(self, max_templates: int = TEMPLATE_CACHE_SIZE):
+        self.max_templates = max_templates
+        self._templates = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        
+        solver = MathProblemSolver()
+        self._keyword_fragments = {
+            fragment
+            for keywords in solver.word_patterns.values()
+            for keyword in keywords
+            for fragment in keyword.split()
+        }
+    
+    def canonicalize(self, text: str) -> Tuple[str, List[str]]:
+        """
+        Replace operands, names and counted objects with placeholders.
+        
+        Returns:
+            Tuple[str, List[str]]: (template, slot values in order of appearance)
+        """
+        slots = []
+        previous_was_number = False
+        previous_end = None
+        
+        def replace(match):
+            nonlocal previous_was_number, previous_end
+            word = match.group(0)
+            after_number, previous_was_number = previous_was_number, word.isdigit()
+            sentence_start = previous_end is None or self.SENTENCE_END_PATTERN.search(
+                text, previous_end, match.start()
+            ) is not None
+            previous_end = match.end()
+            if word.isdigit():
+                slots.append(word)
+                return '{n}'
+            lowered = word.lower()
+            if sentence_start or word == 'I' or any(fragment in lowered for fragment in self._keyword_fragments):
+                return word
+            counted_object = (
+                after_number and lowered.endswith('s') and not lowered.endswith('ss')
+                and lowered not in self.ITEM_STOPWORDS
+            )
+            if word[0].isupper() or counted_object:
+                slots.append(word)
+                return '{w}'
+            return word
+        
+        template = self.TOKEN_PATTERN.sub(replace, text)
+        return ' '.join(template.lower().split()), slots
+    
+    @staticmethod
+    def _slot_pattern(slots: List[str]):
+        alternatives = sorted((re.escape(slot) for slot in slots), key=len, reverse=True)
+        return re.compile(r'\b(?:' + '|'.join(alternatives) + r')\b')
+    
+    def store(self, template: str, slots: List[str], guidance: Dict[str, any]):
+        """Cache guidance as a skeleton if every number in it maps to a slot."""
+        if not slots or len(set(slots)) != len(slots):
+            return
+        
+        numbers = [str(number) for number in guidance['numbers']]
+        if any(slots.count(number) != 1 for number in numbers):
+            return
+        
+        slot_index = {slot: index for index, slot in enumerate(slots)}
+        slot_pattern = self._slot_pattern(slots)
+        
+        def to_skeleton(value):
+            skeleton = slot_pattern.sub(lambda m: f"\x00{slot_index[m.group(0)]}\x00", str(value))
+            if self.NUMBER_PATTERN.search(self.SLOT_MARKER_PATTERN.sub('', skeleton)):
+                raise ValueError('guidance mentions a number that is not a slot')
+            return skeleton
+        
+        try:
+            entry = {
+                'operation': guidance['operation'],
+                'operand_slots': [slot_index[number] for number in numbers],
+                'steps': [to_skeleton(step) for step in guidance['steps']]
+            }
+            for field in self.TEXT_FIELDS:
+                if guidance.get(field):
+                    entry[field] = to_skeleton(guidance[field])
+        except ValueError:
+            return
+        
+        with self._lock:
+            self._templates[template] = entry
+            self._templates.move_to_end(template)
+            while len(self._templates) > self.max_templates:
+                self._templates.popitem(last=False)
+    
+    def lookup(self, template: str, slots: List[str]) -> Optional[Dict[str, any]]:
+        """Return guidance for this problem from a cached skeleton, or None."""
+        with self._lock:
+            entry = self._templates.get(template)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._templates.move_to_end(template)
+            self.hits += 1
+        
+        def fill(skeleton):
+            return self.SLOT_MARKER_PATTERN.sub(lambda m: slots[int(m.group(1))], skeleton)
+        
+        guidance = {
+            'operation': entry['operation'],
+            'numbers': [int(slots[index]) for index in entry['operand_slots']],
+            'steps': [fill(step) for step in entry['steps']]
+        }
+        for field in self.TEXT_FIELDS:
+            if field in entry:
+                guidance[field] = fill(entry[field])
+        return guidance
+
+word_problem_cache = WordProblemTemplateCache()
+
+class LLMBackendError(Exception):
+    """Raised when the LLM returns an error status or unusable guidance."""
+
+class AsyncHTTPConnectionPool:
+    """
+    Minimal asyncio HTTP/1.1 client for a single endpoint.
+    
+    Connections are kept alive and reused, so warm Lambda invocations skip
+    the TCP and TLS handshakes. Must only be used from one event loop.
+    """
+    
+    def __init__(self, url: str, max_idle: int = 4):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.use_tls = parts.scheme == 'https'
+        self.port = parts.port or (443 if self.use_tls else 80)
+        self.path = (parts.path or '/') + ('?' + parts.query if parts.query else '')
+        self.max_idle = max_idle
+        self._ssl_context = ssl.create_default_context() if self.use_tls else None
+        self._idle = []
+    
+    async def _acquire(self):
+        while self._idle:
+            reader, writer = self._idle.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                return reader, writer, True
+            writer.close()
+        reader, writer = await asyncio.open_connection(self.host, self.port, ssl=self._ssl_context)
+        return reader, writer, False
+    
+    async def prewarm(self):
+        """Open one keep-alive connection so the next request skips the handshakes."""
+        if not self._idle:
+            reader, writer, _ = await self._acquire()
+            self._release(reader, writer, True)
+    
+    def _release(self, reader, writer, keep_alive: bool):
+        if keep_alive and len(self._idle) < self.max_idle:
+            self._idle.append((reader, writer))
+        else:
+            writer.close()
+    
+    @staticmethod
+    async def _read_chunked(reader) -> bytes:
+        chunks = []
+        while True:
+            size = int((await reader.readline()).split(b';')[0].strip(), 16)
+            if size == 0:
+                # Skip optional trailers up to the terminating blank line
+                while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                    pass
+                return b''.join(chunks)
+            chunks.append(await reader.readexactly(size))
+            await reader.readline()
+    
+    async def post_json(self, payload: Dict, headers: Dict = None) -> Tuple[int, Dict]:
+        """
+        POST a JSON payload and return (status_code, parsed_json_body).
+        
+        A reused connection the server already closed is retried once on a
+        fresh connection.
+        """
+        body = json.dumps(payload).encode('utf-8')
+        request_head = (
+            f"POST {self.path} HTTP/1.1\r\n"
+            f"Host: {self.host}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: keep-alive\r\n"
+            + ''.join(f"{key}: {value}\r\n" for key, value in (headers or {}).items())
+            + "\r\n"
+        ).encode('latin-1')
+        
+        while True:
+            reader, writer, reused = await self._acquire()
+            keep_alive = False
+            try:
+                writer.write(request_head + body)
+                await writer.drain()
+                status_line = await reader.readline()
+                if not status_line:
+                    if reused:
+                        continue
+                    raise LLMBackendError("Connection closed before response")
+                
+                status = int(status_line.split()[1])
+                response_headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    key, _, value = line.decode('latin-1').partition(':')
+                    response_headers[key.strip().lower()] = value.strip()
+                
+                if response_headers.get('transfer-encoding', '').lower() == 'chunked':
+                    data = await self._read_chunked(reader)
+                else:
+                    data = await reader.readexactly(int(response_headers.get('content-length', '0')))
+                
+                keep_alive = response_headers.get('connection', '').lower() != 'close'
+                return status, json.loads(data) if data else {}
+            except (ConnectionError, asyncio.IncompleteReadError):
+                if reused:
+                    continue
+                raise
+            finally:
+                # Cancelled or failed requests leave the stream in an unknown state, so drop it
+                self._release(reader, writer, keep_alive)
+
+class _BackgroundEventLoop:
+    """
+    A long-lived event loop on a daemon thread.
+    
+    lambda_handler is synchronous, but pooled connections are bound to the
+    loop that opened them, so the loop has to outlive each invocation.
+    """
+    
+    def __init__(self):
+        self._loop = None
+        self._lock = threading.Lock()
+    
+    def submit(self, coroutine):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name='guidance-loop', daemon=True).start()
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+
+class LLMGuidanceBackend(GuidanceBackend):
+    """
+    LLM-generated guidance for word problems with rule-based fallback.
+    
+    Symbolic problems that MathProblemSolver matches directly short-circuit
+    to the rule-based backend. Everything else goes to the LLM under a strict
+    deadline; a hedged second request fires if the first is slow or fails.
+    Missed deadlines and unusable replies fall back to MathProblemSolver.
+    Valid replies are cached per word problem template (WordProblemTemplateCache).
+    """
+    
+    name = 'llm'
+    
+    SYSTEM_PROMPT = (
+        "You are a kind math tutor for elementary students. Never give the final answer. "
+        "Reply with only a JSON object with keys: operation (one of addition, subtraction, "
+        "multiplication, division, unknown), numbers (the two operands in order), strategy, "
+        "steps (list of short hints), abacus_tip, mental_math_trick, encouragement."
+    )
+    
+    def __init__(self, api_url: str = LLM_API_URL, api_key: str = LLM_API_KEY, model: str = LLM_MODEL,
+                 deadline: float = LLM_DEADLINE_SECONDS, hedge_delay: float = LLM_HEDGE_DELAY_SECONDS,
+                 template_cache: WordProblemTemplateCache = word_problem_cache):
+        self.model = model
+        self.template_cache = template_cache
+        self.deadline = deadline
+        self.hedge_delay = hedge_delay
+        self.headers = {'Authorization': f'Bearer {api_key}'} if api_key else {}
+        self.pool = AsyncHTTPConnectionPool(api_url)
+        self.fallback = RuleBasedGuidanceBackend()
+        self._loop = _BackgroundEventLoop()
+    
+    def generate_guidance(self, solver: MathProblemSolver, problem_text: str) -> Tuple[str, List[int], Dict[str, any]]:
+        if solver.match_direct_pattern(problem_text):
+            return self.fallback.generate_guidance(solver, problem_text)
+        
+        # Problems sharing a template with an earlier one skip the LLM round-trip
+        template, slots = self.template_cache.canonicalize(problem_text)
+        cached_guidance = self.template_cache.lookup(template, slots)
+        if cached_guidance and self._is_valid(solver, problem_text, cached_guidance):
+            return self._to_hints(solver, cached_guidance)
+        
+        future = self._loop.submit(self._request_guidance(problem_text))
+        try:
+            llm_guidance = future.result(timeout=self.deadline + 0.1)
+        except Exception as e:
+            future.cancel()
+            logger.warning(f"LLM guidance unavailable, using rule-based fallback: {type(e).__name__}: {e}")
+            return self.fallback.generate_guidance(solver, problem_text)
+        
+        if not self._is_valid(solver, problem_text, llm_guidance):
+            logger.warning("LLM guidance failed validation, using rule-based fallback")
+            return self.fallback.generate_guidance(solver, problem_text)
+        
+        self.template_cache.store(template, slots, llm_guidance)
+        return self._to_hints(solver, llm_guidance)
+    
+    def warm(self):
+        future = self._loop.submit(asyncio.wait_for(self.pool.prewarm(), self.deadline))
+        try:
+            future.result(timeout=self.deadline + 0.1)
+        except Exception as e:
+            future.cancel()
+            logger.warning(f"Could not pre-open LLM connection: {type(e).__name__}: {e}")
+    
+    async def _request_guidance(self, problem_text: str) -> Dict[str, any]:
+        return await asyncio.wait_for(self._hedged_completion(problem_text), self.deadline)
+    
+    async def _hedged_completion(self, problem_text: str) -> Dict[str, any]:
+        pending = {asyncio.ensure_future(self._completion(problem_text))}
+        hedged = False
+        last_error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=None if hedged else self.hedge_delay,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    last_error = task.exception()
+                if not hedged:
+                    pending.add(asyncio.ensure_future(self._completion(problem_text)))
+                    hedged = True
+            raise last_error
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    async def _completion(self, problem_text: str) -> Dict[str, any]:
+        status, data = await self.pool.post_json({
+            'model': self.model,
+            'temperature': 0.2,
+            'messages': [
+                {'role': 'system', 'content': self.SYSTEM_PROMPT},
+                {'role': 'user', 'content': problem_text}
+            ]
+        }, self.headers)
+        if status != 200:
+            raise LLMBackendError(f"LLM returned status {status}")
+        
+        try:
+            llm_guidance = json.loads(data['choices'][0]['message']['content'])
+        except (KeyError, IndexError, TypeError, json.JSONDecodeError) as e:
+            raise LLMBackendError(f"Malformed LLM reply: {e}")
+        if not isinstance(llm_guidance, dict) or not isinstance(llm_guidance.get('operation'), str):
+            raise LLMBackendError("Malformed LLM reply: expected an object with a string operation")
+        return llm_guidance
+    
+    @staticmethod
+    def _is_valid(solver: MathProblemSolver, problem_text: str, llm_guidance: Dict[str, any]) -> bool:
+        """Check LLM guidance has a known operation, usable steps and operands taken from the problem."""
+        numbers = llm_guidance.get('numbers')
+        steps = llm_guidance.get('steps')
+        
+        valid = (
+            llm_guidance.get('operation') in solver.patterns
+            and isinstance(numbers, list) and len(numbers) == 2
+            and all(isinstance(n, int) for n in numbers)
+            and isinstance(steps, list) and steps
+        )
+        if not valid:
+            return False
+        
+        # Operands must appear in the problem (within the role's limit); never show invented numbers
+        available = Counter(solver.extract_numbers(problem_text.lower()))
+        return not (Counter(numbers) - available)
+    
+    def _to_hints(self, solver: MathProblemSolver, llm_guidance: Dict[str, any]) -> Tuple[str, List[int], Dict[str, any]]:
+        """Shape validated LLM guidance like MathProblemSolver hints."""
+        operation = llm_guidance['operation']
+        numbers = llm_guidance['numbers']
+        steps = llm_guidance['steps']
+        
+        num1, num2 = numbers
+        if (operation == 'subtraction' and num1 < num2) or (operation == 'division' and num2 == 0):
+            # Let the rule-based hints explain the problem with the numbers
+            return operation, numbers, solver.generate_educational_hint(operation, numbers)
+        
+        # Rule-based hints only fill in fields the LLM left out
+        text = {field: llm_guidance.get(field) for field in WordProblemTemplateCache.TEXT_FIELDS}
+        if not all(text.values()):
+            rule_hints = solver.generate_educational_hint(operation, numbers)
+            text = {field: value or rule_hints[field] for field, value in text.items()}
+        
+        hints = {
+            'operation': operation,
+            'difficulty': solver._assess_difficulty(num1, num2, operation),
+            'strategy': text['strategy'],
+            'steps': [str(step) for step in steps],
+            'abacus_tip': text['abacus_tip'],
+            'mental_math_trick': text['mental_math_trick'],
+            'encouragement': text['encouragement']
+        }
+        return operation, numbers, solver.apply_role_customization(hints, operation, numbers)
+
+_guidance_backend = None
+_guidance_backend_lock = threading.Lock()
+
+def get_guidance_backend() -> GuidanceBackend:
+    """Return the configured guidance backend, created once per container."""
+    global _guidance_backend
+    with _guidance_backend_lock:
+        if _guidance_backend is None:
+            if GUIDANCE_BACKEND == 'llm':
+                _guidance_backend = LLMGuidanceBackend()
+            else:
+                _guidance_backend = RuleBasedGuidanceBackend()
+            logger.info(f"Using guidance backend: {_guidance_backend.name}")
+        return _guidance_backend
+
+class ProgressStore:
+    """
+    Durable per-student progress: attempts and struggles per (operation, difficulty).
+    
+    SQLite in WAL mode is the local stand-in for a managed database. Writes go
+    to an in-memory write-behind buffer that a background thread flushes in
+    batches, so request latency never includes a disk write. Reads are served
+    from an LRU cache of per-student aggregates that record() keeps current;
+    misses use their own connection, which WAL lets run alongside a flush or
+    compaction instead of waiting for it.
+    Buffered writes are durable once flushed (every flush_interval seconds or
+    flush_batch records, whichever comes first); a failed flush is rolled back
+    and its batch retried, and close() (also run at exit) flushes the rest.
+    Students are stored under a hash of their API key, never the key itself.
+    """
+    
+    COMPACT_EVERY_FLUSHES = 50
+    
+    def __init__(self, path: str = PROGRESS_DB_PATH, flush_interval: float = PROGRESS_FLUSH_SECONDS,
+                 flush_batch: int = PROGRESS_FLUSH_BATCH, cache_size: int = PROGRESS_CACHE_SIZE,
+                 retention_days: int = PROGRESS_RETENTION_DAYS):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        self.cache_size = cache_size
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._pending = {}
+        self._pending_records = 0
+        # Batch being written by flush(), and how many commits have finished or started
+        self._in_flight = {}
+        self._commits = 0
+        self._committing = False
+        self._cache = OrderedDict()
+        self._flushes = 0
+        self._wake = threading.Event()
+        
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute('PRAGMA auto_vacuum=INCREMENTAL')
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS progress ('
+            'student TEXT NOT NULL, operation TEXT NOT NULL, difficulty TEXT NOT NULL, '
+            'attempts INTEGER NOT NULL, struggles INTEGER NOT NULL, last_seen REAL NOT NULL, '
+            'PRIMARY KEY (student, operation, difficulty)) WITHOUT ROWID'
+        )
+        self._read_lock = threading.Lock()
+        self._reader = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        
+        self._closed = False
+        threading.Thread(target=self._flush_loop, name='progress-flusher', daemon=True).start()
+        # Buffered attempts would otherwise be lost when the process stops
+        atexit.register(self.close)
+    
+    @staticmethod
+    def student_id(api_key: str) -> str:
+        return hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:32]
+    
+    def record(self, api_key: str, operation: str, difficulty: str, success: bool):
+        """Buffer one attempt; never touches the database on the request path."""
+        student = self.student_id(api_key)
+        key = (operation, difficulty)
+        struggle = 0 if success else 1
+        with self._lock:
+            pending = self._pending.setdefault((student, operation, difficulty), [0, 0, 0.0])
+            pending[0] += 1
+            pending[1] += struggle
+            pending[2] = time.time()
+            self._pending_records += 1
+            
+            aggregates = self._cache.get(student)
+            if aggregates is not None:
+                attempts, struggles = aggregates.get(key, (0, 0))
+                aggregates[key] = (attempts + 1, struggles + struggle)
+            
+            should_flush = self._pending_records >= self.flush_batch
+        
+        if should_flush:
+            self._wake.set()
+    
+    def history(self, api_key: str) -> Dict[Tuple[str, str], Tuple[int, int]]:
+        """(operation, difficulty) -> (attempts, struggles), including unflushed attempts."""
+        student = self.student_id(api_key)
+        with self._lock:
+            aggregates = self._cache.get(student)
+            if aggregates is not None:
+                self._cache.move_to_end(student)
+                return aggregates
+        
+        while True:
+            with self._lock:
+                commits = self._commits
+            with self._read_lock:
+                rows = self._reader.execute(
+                    'SELECT operation, difficulty, attempts, struggles FROM progress WHERE student = ?', (student,)
+                ).fetchall()
+            
+            with self._lock:
+                # A commit during the SELECT may or may not be in the rows; read again
+                if self._committing or self._commits != commits:
+                    continue
+                aggregates = self._cache.get(student)
+                if aggregates is None:
+                    aggregates = {(operation, difficulty): (attempts, struggles)
+                                  for operation, difficulty, attempts, struggles in rows}
+                    # Without a commit since the SELECT, the rows hold neither the batch
+                    # being written nor what is still buffered
+                    for batch in (self._in_flight, self._pending):
+                        for (pending_student, operation, difficulty), (attempts, struggles, _) in batch.items():
+                            if pending_student == student:
+                                flushed = aggregates.get((operation, difficulty), (0, 0))
+                                aggregates[(operation, difficulty)] = (flushed[0] + attempts, flushed[1] + struggles)
+                    self._cache[student] = aggregates
+                    while len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+                return aggregates
+    
+    def flush(self) -> int:
+        """Write buffered attempts to SQLite in one transaction; returns rows upserted."""
+        with self._db_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                self._in_flight = pending
+                self._pending_records = 0
+            if not pending:
+                return 0
+            
+            try:
+                self._db.execute('BEGIN')
+                self._db.executemany(
+                    'INSERT INTO progress (student, operation, difficulty, attempts, struggles, last_seen) '
+                    'VALUES (?, ?, ?, ?, ?, ?) '
+                    'ON CONFLICT (student, operation, difficulty) DO UPDATE SET '
+                    'attempts = attempts + excluded.attempts, struggles = struggles + excluded.struggles, '
+                    'last_seen = excluded.last_seen',
+                    [(student, operation, difficulty, attempts, struggles, last_seen)
+                     for (student, operation, difficulty), (attempts, struggles, last_seen) in pending.items()]
+                )
+                with self._lock:
+                    self._committing = True
+                try:
+                    self._db.execute('COMMIT')
+                finally:
+                    with self._lock:
+                        self._committing = False
+                        self._commits += 1
+            except sqlite3.Error:
+                if self._db.in_transaction:
+                    self._db.execute('ROLLBACK')
+                self._requeue(pending)
+                raise
+            with self._lock:
+                self._in_flight = {}
+            self._flushes += 1
+            if self._flushes % self.COMPACT_EVERY_FLUSHES == 0:
+                self._compact()
+            return len(pending)
+    
+    def _requeue(self, pending: Dict):
+        """Merge a batch that failed to flush back into the buffer for the next attempt."""
+        with self._lock:
+            self._in_flight = {}
+            for key, (attempts, struggles, last_seen) in pending.items():
+                buffered = self._pending.setdefault(key, [0, 0, 0.0])
+                buffered[0] += attempts
+                buffered[1] += struggles
+                buffered[2] = max(buffered[2], last_seen)
+                self._pending_records += attempts
+    
+    def close(self):
+        """Flush buffered attempts and close the database."""
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        try:
+            self.flush()
+        except sqlite3.Error as e:
+            logger.warning(f"Final progress flush failed: {e}")
+        with self._db_lock:
+            self._db.close()
+        with self._read_lock:
+            self._reader.close()
+    
+    def _compact(self):
+        """Drop stale students, checkpoint the WAL and return free pages to the OS."""
+        cutoff = time.time() - self.retention_days * 86400
+        self._db.execute('DELETE FROM progress WHERE last_seen < ?', (cutoff,))
+        self._db.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        self._db.execute('PRAGMA incremental_vacuum')
+    
+    def compact(self):
+        with self._db_lock:
+            self._compact()
+    
+    def _flush_loop(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if self._closed:
+                return
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                logger.warning(f"Progress flush failed, will retry: {e}")
+
+_progress_store = None
+_progress_store_lock = threading.Lock()
+
+def get_progress_store() -> Optional[ProgressStore]:
+    """Open the progress store once per container; None if tracking is disabled or unavailable."""
+    global _progress_store, PROGRESS_TRACKING
+    if not PROGRESS_TRACKING:
+        return None
+    with _progress_store_lock:
+        if _progress_store is None:
+            try:
+                _progress_store = ProgressStore()
+            except sqlite3.Error as e:
+                logger.warning(f"Progress tracking disabled: {e}")
+                PROGRESS_TRACKING = False
+        return _progress_store
+
+class PrebuiltResponseTable:
+    """
+    Memory-mapped table of serialized responses for symbolic problems with small operands.
+    
+    Every (operation, num1, num2) with operands up to max_operand is rendered
+    once at build time. Per-request fields (timestamp, original problem, role)
+    are left as NUL markers in the body, and role notes are stored as separate
+    segments, so one body serves every role. The adaptive hint is the last
+    marker, filled per student like apply_progress does for pipeline
+    responses. A lookup is a slice of the mapped
+    file plus a join; no hint generation or JSON encoding runs. The pages live
+    in the OS page cache and are shared by every process mapping the file.
+    
+    File layout: header, fixed-size index of (offset, length) pairs for the
+    body, teacher notes and parent tips segments plus a success flag, then
+    the data region.
+    """
+    
+    MAGIC = b'SHARESP2'
+    HEADER = struct.Struct('<8s16sHI')
+    INDEX_ENTRY = struct.Struct('<6I?')
+    OPERATIONS = MathProblemSolver.OPERATIONS
+    MARKER = b'\x00'
+    
+    # Sentinels rendered into the body at build time and replaced by MARKER
+    _TIMESTAMP_SENTINEL = '\x00timestamp'
+    _PROBLEM_SENTINEL = '\x00problem'
+    _ROLE_SENTINEL = '\x00role'
+    _NOTES_SENTINEL = '\x00notes'
+    _HINT_SENTINEL = '\x00hint'
+    
+    def __init__(self, path: str):
+        with open(path, 'rb') as table_file:
+            self._mmap = mmap.mmap(table_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, fingerprint, self.max_operand, _ = self.HEADER.unpack_from(self._mmap, 0)
+        if magic != self.MAGIC:
+            raise ValueError(f"{path} is not a response table")
+        if fingerprint != self.source_fingerprint():
+            raise ValueError(f"{path} was built from a different lambda_function.py; rebuild it")
+    
+    @staticmethod
+    def source_fingerprint() -> bytes:
+        """Hash of this module's source, so tables built from other hint text are rejected."""
+        with open(os.path.abspath(__file__), 'rb') as source_file:
+            return hashlib.sha256(source_file.read()).digest()[:16]
+    
+    @classmethod
+    def _index_position(cls, operation_index: int, num1: int, num2: int, max_operand: int) -> int:
+        span = max_operand + 1
+        entry = (operation_index * span + num1) * span + num2
+        return cls.HEADER.size + entry * cls.INDEX_ENTRY.size
+    
+    def _entry(self, operation: str, numbers: List[int]) -> Optional[Tuple]:
+        """Index entry for the problem, or None if it is outside the table."""
+        if operation not in self.OPERATIONS or len(numbers) != 2:
+            return None
+        num1, num2 = numbers
+        if not (0 <= num1 <= self.max_operand and 0 <= num2 <= self.max_operand):
+            return None
+        position = self._index_position(self.OPERATIONS.index(operation), num1, num2, self.max_operand)
+        return self.INDEX_ENTRY.unpack_from(self._mmap, position)
+    
+    def succeeded(self, operation: str, numbers: List[int]) -> Optional[bool]:
+        """Whether the stored response is a success, or None if the problem is outside the table."""
+        entry = self._entry(operation, numbers)
+        return None if entry is None else entry[6]
+    
+    def lookup(self, operation: str, numbers: List[int], role: str, problem_text: str,
+               adaptive_hint: Optional[str] = None) -> Optional[str]:
+        """Return the serialized response body, or None if the problem is outside the table."""
+        entry = self._entry(operation, numbers)
+        if entry is None:
+            return None
+        body_offset, body_length, teacher_offset, teacher_length, parent_offset, parent_length, _ = entry
+        
+        if role == 'teacher':
+            notes = self._mmap[teacher_offset:teacher_offset + teacher_length]
+        elif role == 'parent':
+            notes = self._mmap[parent_offset:parent_offset + parent_length]
+        else:
+            notes = b''
+        
+        fields = (
+            json.dumps(datetime.utcnow().isoformat()).encode('utf-8'),
+            json.dumps(problem_text).encode('utf-8'),
+            json.dumps(role).encode('utf-8'),
+            notes,
+            (', "adaptive_hint": ' + json.dumps(adaptive_hint)).encode('utf-8') if adaptive_hint else b''
+        )
+        parts = self._mmap[body_offset:body_offset + body_length].split(self.MARKER)
+        body = bytearray(parts[0])
+        for field, part in zip(fields, parts[1:]):
+            body += field
+            body += part
+        return body.decode('utf-8')
+    
+    @classmethod
+    def _render(cls, operation: str, num1: int, num2: int) -> Tuple[bytes, bytes, bytes, bool]:
+        """Render the shared body, the teacher/parent note segments and the success flag for one problem."""
+        numbers = [num1, num2]
+        hints = MathProblemSolver(user_role='student').generate_educational_hint(operation, numbers)
+        hints['teacher_notes'] = cls._NOTES_SENTINEL
+        response = EducationalResponseGenerator.format_response(
+            cls._PROBLEM_SENTINEL, operation, numbers, hints, {'role': cls._ROLE_SENTINEL}
+        )
+        response['timestamp'] = cls._TIMESTAMP_SENTINEL
+        # apply_progress adds the adaptive hint as the last key
+        response['adaptive_hint'] = cls._HINT_SENTINEL
+        body = json.dumps(response, default=str)
+        
+        # Notes are only rendered for successful responses, right before the footer;
+        # failed responses get an always-empty notes marker so every body has five
+        notes_field = ', "teacher_notes": ' + json.dumps(cls._NOTES_SENTINEL)
+        hint_field = ', "adaptive_hint": ' + json.dumps(cls._HINT_SENTINEL)
+        if notes_field in body:
+            body = body.replace(notes_field, '\x00').replace(hint_field, '\x00')
+        else:
+            body = body.replace(hint_field, '\x00\x00')
+        for sentinel in (cls._TIMESTAMP_SENTINEL, cls._PROBLEM_SENTINEL, cls._ROLE_SENTINEL):
+            body = body.replace(json.dumps(sentinel), '\x00')
+        
+        segments = []
+        for role, key in (('teacher', 'teacher_notes'), ('parent', 'parent_tips')):
+            role_hints = MathProblemSolver(user_role=role).generate_educational_hint(operation, numbers)
+            if operation != 'unknown' and 'error' not in role_hints and key in role_hints:
+                segments.append((', ' + json.dumps(key) + ': ' + json.dumps(role_hints[key])).encode('utf-8'))
+            else:
+                segments.append(b'')
+        
+        return body.encode('utf-8'), segments[0], segments[1], response['success']
+    
+    @classmethod
+    def build(cls, path: str, max_operand: int = 100) -> int:
+        """
+        Precompute the table for all operations and operands 0..max_operand.
+        
+        Returns:
+            int: Number of problems written
+        """
+        span = max_operand + 1
+        count = len(cls.OPERATIONS) * span * span
+        data_start = cls.HEADER.size + count * cls.INDEX_ENTRY.size
+        index = bytearray(count * cls.INDEX_ENTRY.size)
+        
+        with open(path, 'wb') as table_file:
+            table_file.write(cls.HEADER.pack(cls.MAGIC, cls.source_fingerprint(), max_operand, count))
+            table_file.seek(data_start)
+            offset = data_start
+            for operation_index, operation in enumerate(cls.OPERATIONS):
+                for num1 in range(span):
+                    for num2 in range(span):
+                        entry = []
+                        *segments, success = cls._render(operation, num1, num2)
+                        for segment in segments:
+                            table_file.write(segment)
+                            entry.extend((offset, len(segment)))
+                            offset += len(segment)
+                        entry.append(success)
+                        position = cls._index_position(operation_index, num1, num2, max_operand) - cls.HEADER.size
+                        cls.INDEX_ENTRY.pack_into(index, position, *entry)
+            table_file.seek(cls.HEADER.size)
+            table_file.write(index)
+        
+        return count
+
+_response_table = None
+_response_table_loaded = False
+
+def get_response_table() -> Optional[PrebuiltResponseTable]:
+    """Map the prebuilt response table once per container; None if it is missing or stale."""
+    global _response_table, _response_table_loaded
+    if not _response_table_loaded:
+        _response_table_loaded = True
+        if os.path.exists(RESPONSE_TABLE_PATH):
+            try:
+                _response_table = PrebuiltResponseTable(RESPONSE_TABLE_PATH)
+                logger.info(f"Mapped response table from {RESPONSE_TABLE_PATH}")
+            except (OSError, ValueError, struct.error) as e:
+                logger.warning(f"Ignoring response table: {e}")
+    return _response_table
+
+def record_attempt(api_key: Optional[str], user_role: str, operation: str, difficulty: str,
+                   success: bool) -> Optional[str]:
+    """
+    Record one attempt and return the adaptive hint its prior history calls for.
+    
+    Args:
+        api_key (str): Student key, or None to skip tracking
+        user_role (str): Role used for the hint
+        operation (str): Type of math operation
+        difficulty (str): Difficulty from _assess_difficulty, for failed attempts too
+        success (bool): False if the response explained an error
+        
+    Returns:
+        Optional[str]: Adaptive hint, or None
+    """
+    progress_store = get_progress_store()
+    if not progress_store or not api_key or operation not in MathProblemSolver.OPERATIONS:
+        return None
+    
+    history = progress_store.history(api_key)
+    adaptive_hint = MathProblemSolver(user_role=user_role).get_adaptive_hint(operation, difficulty, history)
+    progress_store.record(api_key, operation, difficulty, success)
+    return adaptive_hint
+
+def apply_progress(api_key: Optional[str], user_role: str, response_data: Dict[str, any]) -> Dict[str, any]:
+    """
+    Record this attempt and add the adaptive hint from the student's history.
+    
+    Runs per request after coalescing and caching, so shared results stay
+    student-independent. Returns a copy when a hint is added.
+    """
+    analysis = response_data['analysis']
+    operation, numbers = analysis['operation_identified'], analysis['numbers_found']
+    if operation not in MathProblemSolver.OPERATIONS or len(numbers) < 2:
+        return response_data
+    
+    # Error responses carry no difficulty_level, so rate the operands directly
+    difficulty = MathProblemSolver(user_role=user_role)._assess_difficulty(numbers[0], numbers[1], operation)
+    adaptive_hint = record_attempt(api_key, user_role, operation, difficulty, response_data['success'])
+    
+    if adaptive_hint:
+        response_data = dict(response_data, adaptive_hint=adaptive_hint)
+    return response_data
+
+def format_sse(event_name: str, data: Dict[str, any]) -> str:
+    """Serialize one Server-Sent Event."""
+    return f"event: {event_name}\ndata: {json.dumps(data, default=str)}\n\n"
+
+def stream_guidance_events(problem_text: str, user_info: Dict, guidance_backend: GuidanceBackend = None,
+                           api_key: Optional[str] = None):
+    """
+    Yield (event_name, data) pairs for progressive hint delivery.
+    
+    The problem is classified once, and the operation plus the rule-based
+    first step are sent right away (generate_educational_hint is cheap). The
+    remaining steps, abacus tip and mental math trick follow as separate
+    events. With a slower backend such as the LLM, its guidance replaces the
+    provisional hints once it arrives: an 'operation' event with
+    'corrected': true is sent if the operation or numbers changed, and every
+    step is re-sent (a 'hint' for a step number already sent replaces it).
+    The final 'complete' event carries the full response, identical to the
+    non-streaming endpoint including the attempt being recorded for api_key
+    and its adaptive hint, and always agrees with the last 'operation'.
+    """
+    guidance_backend = guidance_backend or get_guidance_backend()
+    user_role = user_info.get('role', 'student')
+    solver = MathProblemSolver(user_role=user_role)
+    
+    operation, numbers = solver.identify_operation(problem_text)
+    hints = solver.generate_educational_hint(operation, numbers)
+    yield 'operation', {'operation': operation, 'numbers': numbers}
+    
+    steps = hints.get('steps', [])
+    if steps and 'error' not in hints:
+        yield 'hint', {'step': 1, 'total_steps': len(steps), 'hint': steps[0], 'strategy': hints['strategy']}
+    next_step = 2
+    
+    if not isinstance(guidance_backend, RuleBasedGuidanceBackend):
+        refined_operation, refined_numbers, refined_hints = guidance_backend.generate_guidance(solver, problem_text)
+        if (refined_operation, refined_numbers) != (operation, numbers):
+            yield 'operation', {'operation': refined_operation, 'numbers': refined_numbers, 'corrected': True}
+        if refined_hints.get('steps') != steps:
+            next_step = 1
+        operation, numbers, hints = refined_operation, refined_numbers, refined_hints
+    
+    response_data = EducationalResponseGenerator.format_response(
+        problem_text, operation, numbers, hints, user_info
+    )
+    
+    guidance = response_data.get('educational_guidance')
+    if guidance:
+        steps = guidance['step_by_step_hints']
+        for index in range(next_step, len(steps) + 1):
+            yield 'hint', {
+                'step': index,
+                'total_steps': len(steps),
+                'hint': steps[index - 1],
+                'strategy': guidance['learning_strategy']
+            }
+        yield 'abacus_tip', {'abacus_technique': guidance['abacus_technique']}
+        yield 'mental_math_trick', {'mental_math_trick': guidance['mental_math_trick']}
+    
+    yield 'complete', apply_progress(api_key, user_role, response_data)
+
+def normalize_problem_text(problem_text: str) -> str:
+    """Normalize problem text so trivially different submissions share a key."""
+    return ' '.join(problem_text.lower().split())
+
+class _InFlightCall:
+    """A single computation that concurrent identical requests can wait on."""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class RequestCoalescer:
+    """
+    Single-flight coalescing for identical in-flight problems.
+    
+    The first request for a key (the leader) runs the computation; concurrent
+    requests with the same key (followers) wait for the leader and share its
+    result. When a leader is slower than the timeout or fails, the first
+    follower to notice takes over as the new leader and the rest wait on it,
+    so a slow request never stalls the burst and never turns it into one
+    computation per follower.
+    """
+    
+    def __init__(self, timeout: float = COALESCE_TIMEOUT_SECONDS):
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._calls = {}
+    
+    def run(self, key, compute) -> Tuple[any, bool]:
+        """
+        Run compute() once per concurrent key.
+        
+        Args:
+            key: Hashable key identifying identical requests
+            compute: Zero-argument callable producing the result
+            
+        Returns:
+            Tuple[any, bool]: (result, shared) where shared is True for followers
+        """
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                is_leader = call is None
+                if is_leader:
+                    call = _InFlightCall()
+                    self._calls[key] = call
+            
+            if is_leader:
+                try:
+                    call.result = compute()
+                    return call.result, False
+                except Exception as e:
+                    call.error = e
+                    raise
+                finally:
+                    with self._lock:
+                        # A follower may already have taken over this key
+                        if self._calls.get(key) is call:
+                            del self._calls[key]
+                    call.done.set()
+            
+            if call.done.wait(self.timeout) and call.error is None:
+                return call.result, True
+            
+            with self._lock:
+                if self._calls.get(key) is call:
+                    # First follower to give up on this leader becomes the next one
+                    del self._calls[key]
+                    logger.warning("Coalesced leader timed out or failed; promoting a follower")
+
+# Shared across threads of the local server and across warm Lambda invocations
+problem_coalescer = RequestCoalescer()
+
+def process_problem(problem_text: str, user_info: Dict) -> Dict[str, any]:
+    """
+    Run the full solver pipeline for one problem.
+    
+    Args:
+        problem_text (str): Math problem text
+        user_info (Dict): User role and information
+        
+    Returns:
+        Dict: Complete educational response
+    """
+    user_role = user_info.get('role', 'student')
+    
+    # Initialize solver with user role for customization
+    solver = MathProblemSolver(user_role=user_role)
+    
+    # Identify operation, extract numbers and generate educational hints
+    operation, numbers, hints = get_guidance_backend().generate_guidance(solver, problem_text)
+    
+    # Format response with user customization
+    return EducationalResponseGenerator.format_response(
+        problem_text, operation, numbers, hints, user_info
+    )
+
+def solve_problem(problem_text: str, user_info: Dict, api_key: Optional[str]) -> Tuple[str, str, List[int], bool]:
+    """
+    Answer one problem: prebuilt table, then coalesced pipeline, then progress tracking.
+    
+    Args:
+        problem_text (str): Math problem text
+        user_info (Dict): User role and information
+        api_key (str): Student key for progress tracking, or None to skip it
+        
+    Returns:
+        Tuple[str, str, List[int], bool]: (response body, operation, numbers, served_from_table)
+    """
+    user_role = user_info.get('role', 'student')
+    
+    # Symbolic problems with small operands are served straight from the prebuilt table
+    response_table = get_response_table()
+    if response_table and user_info:
+        solver = MathProblemSolver(user_role=user_role)
+        direct_match = solver.match_direct_pattern(problem_text)
+        if direct_match:
+            operation, numbers = direct_match
+            success = response_table.succeeded(operation, numbers)
+            if success is not None:
+                difficulty = solver._assess_difficulty(numbers[0], numbers[1], operation)
+                adaptive_hint = record_attempt(api_key, user_role, operation, difficulty, success)
+                body = response_table.lookup(operation, numbers, user_role, problem_text, adaptive_hint)
+                return body, operation, numbers, True
+    
+    # Identical concurrent problems for the same role share one computation
+    coalesce_key = (normalize_problem_text(problem_text), user_role)
+    response_data, shared = problem_coalescer.run(
+        coalesce_key, lambda: process_problem(problem_text, user_info)
+    )
+    
+    if shared:
+        # Never mutate the leader's result; refresh per-request fields on a copy
+        response_data = dict(
+            response_data,
+            timestamp=datetime.utcnow().isoformat(),
+            original_problem=problem_text
+        )
+    
+    response_data = apply_progress(api_key, user_role, response_data)
+    
+    analysis = response_data['analysis']
+    return json.dumps(response_data, default=str), analysis['operation_identified'], analysis['numbers_found'], False
+
+_container_warmed = False
+
+def warm_up() -> Dict[str, any]:
+    """
+    Initialize every lazily built structure and exercise each code path once.
+    
+    Compiles the solver regexes, opens the progress store, maps the response
+    table and opens a pooled LLM connection if that backend is configured.
+    Then runs one synthetic problem per operation for every role through
+    solve_problem, the same table, coalescer and progress path real requests
+    take. Problems outside the table and a word problem (rule-based backend
+    only, so pings never spend LLM calls) warm the full pipeline.
+    
+    Returns:
+        Dict: Timing report for tuning provisioned concurrency
+    """
+    global _container_warmed
+    cold_start = not _container_warmed
+    start = time.perf_counter()
+    
+    solver = MathProblemSolver()
+    for patterns in solver.patterns.values():
+        for pattern in patterns:
+            re.compile(pattern)
+    
+    progress_store = get_progress_store()
+    if progress_store:
+        progress_store.history('warmup')
+    response_table = get_response_table()
+    guidance_backend = get_guidance_backend()
+    guidance_backend.warm()
+    
+    synthetic_problems = {
+        'addition': ['25 + 17', '250 + 170'],
+        'subtraction': ['45 - 18', '450 - 180'],
+        'multiplication': ['7 × 8', '70 × 80'],
+        'division': ['56 ÷ 7', '560 ÷ 70']
+    }
+    if guidance_backend.name == 'rules':
+        synthetic_problems['subtraction'].append('Sarah has 20 candies and gives 5 to Tom. How many are left?')
+    
+    for role in {info['role'] for info in USER_ROLES.values()}:
+        user_info = {'role': role}
+        for problems in synthetic_problems.values():
+            for problem_text in problems:
+                solve_problem(problem_text, user_info, api_key=None)
+    
+    _container_warmed = True
+    return {
+        'warmup': True,
+        'cold_start': cold_start,
+        'module_init_ms': round(_MODULE_INIT_MS, 3),
+        'warmup_ms': round((time.perf_counter() - start) * 1000, 3),
+        'guidance_backend': guidance_backend.name,
+        'response_table_loaded': response_table is not None,
+        'progress_store_open': progress_store is not None,
+        'operations_warmed': list(synthetic_problems),
+        'timestamp': datetime.utcnow().isoformat()
+    }
+
+@profiler
 @require_auth
 def lambda_handler(event, context):
     """
@@ -676,6 +2168,16 @@ def lambda_handler(event, context):
         'Content-Type': 'application/json'
     }
     
+    # Handle keep-warm pings before any request parsing
+    if is_warmup_event(event):
+        warmup_report = warm_up()
+        logger.info(f"Warmup complete: {warmup_report}")
+        return {
+            'statusCode': 200,
+            'headers': cors_headers,
+            'body': json.dumps(warmup_report)
+        }
+    
     # Handle CORS preflight requests
     if event.get('httpMethod') == 'OPTIONS':
         return {
@@ -695,6 +2197,7 @@ def lambda_handler(event, context):
                 'description': 'Educational AI assistant for elementary math problems with authentication',
                 'endpoints': {
                     'POST /process-homework': 'Submit math problems for educational hints (requires API key)',
+                    'POST /process-homework/stream': 'Progressive hints as Server-Sent Events (local server only, requires API key)',
                     'GET /': 'API information'
                 },
                 'authentication': {
@@ -769,32 +2272,21 @@ def lambda_handler(event, context):
                 })
             }
         
-        # Process the math problem
-        logger.info(f"Processing problem for {user_role}: {problem_text}")
-        
-        # Initialize solver with user role for customization
-        solver = MathProblemSolver(user_role=user_role)
-        
-        # Identify operation and extract numbers
-        operation, numbers = solver.identify_operation(problem_text)
-        
-        # Generate educational hints
-        hints = solver.generate_educational_hint(operation, numbers)
+        api_key = get_api_key(event.get('headers', {}))
         
-        # Format response with user customization
-        response_generator = EducationalResponseGenerator()
-        response_data = response_generator.format_response(
-            problem_text, operation, numbers, hints, user_info
-        )
+        body, operation, numbers, from_table = solve_problem(problem_text, user_info, api_key)
         
         # Log successful processing with usage tracking
         log_usage(event.get('headers', {}).get('x-api-key', ''), problem_text, True, user_info)
-        logger.info(f"Successfully processed {operation} problem with {len(numbers)} numbers for {user_role}")
+        if from_table:
+            logger.info(f"Served {operation} problem from response table for {user_role}")
+        else:
+            logger.info(f"Successfully processed {operation} problem with {len(numbers)} numbers for {user_role}")
         
         return {
             'statusCode': 200,
             'headers': cors_headers,
-            'body': json.dumps(response_data, default=str)
+            'body': body
         }
         
     except Exception as e:
@@ -814,4 +2306,7 @@ def lambda_handler(event, context):
                 'details': str(e) if user_info.get('role') == 'admin' else 'Sorry, something went wrong. Please try again.',
                 'timestamp': datetime.utcnow().isoformat()
             })
-        }
\ No newline at end of file
+        }
+
+# Import-time cost of this module, reported by warmup invocations
+_MODULE_INIT_MS = (time.perf_counter() - _MODULE_INIT_STARTED) * 1000
@@ -0,0 +1,90 @@
+# Local stand-in for the OpenAI chat completions API
+# Used to exercise LLMGuidanceBackend in local testing and benchmarks without network access or API keys
+
+import argparse
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from lambda_function import MathProblemSolver
+
+
+class StubLLMHandler(BaseHTTPRequestHandler):
+    """Answers chat completion requests with guidance derived from MathProblemSolver."""
+
+    # Keep-alive so the backend's connection pool is exercised
+    protocol_version = 'HTTP/1.1'
+    latency = 0.0
+    jitter = 0.0
+    fail_rate = 0.0
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        request_data = json.loads(self.rfile.read(length) or b'{}')
+        problem_text = request_data.get('messages', [{}])[-1].get('content', '')
+
+        time.sleep(self.response_delay())
+
+        if random.random() < self.fail_rate:
+            self._send_json(503, {'error': {'message': 'Stub overloaded'}})
+            return
+
+        guidance = self.guidance_for(problem_text)
+        self._send_json(200, {
+            'id': f'stub-{time.time_ns()}',
+            'object': 'chat.completion',
+            'model': request_data.get('model', 'stub'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': json.dumps(guidance)},
+                'finish_reason': 'stop'
+            }]
+        })
+
+    def guidance_for(self, problem_text):
+        """Tutor reply for the problem; override to script bad replies in tests."""
+        solver = MathProblemSolver()
+        operation, numbers = solver.identify_operation(problem_text)
+        hints = solver.generate_educational_hint(operation, numbers)
+        return {
+            'operation': operation,
+            'numbers': numbers[:2],
+            'strategy': hints.get('strategy', ''),
+            'steps': ["Read the story carefully and find the two numbers"] + hints.get('steps', []),
+            'abacus_tip': hints.get('abacus_tip', ''),
+            'mental_math_trick': hints.get('mental_math_trick', ''),
+            'encouragement': hints.get('encouragement', '')
+        }
+
+    def response_delay(self):
+        """Seconds to wait before answering; override to script latency in tests."""
+        return self.latency + random.uniform(0, self.jitter)
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Stub LLM server for the guidance backend')
+    parser.add_argument('--port', type=int, default=8787)
+    parser.add_argument('--latency', type=float, default=0.3, help='Base response delay in seconds')
+    parser.add_argument('--jitter', type=float, default=0.2, help='Extra random delay in seconds')
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='Fraction of requests answered with 503')
+    args = parser.parse_args()
+
+    StubLLMHandler.latency = args.latency
+    StubLLMHandler.jitter = args.jitter
+    StubLLMHandler.fail_rate = args.fail_rate
+
+    print(f"🤖 Stub LLM listening on http://localhost:{args.port}/v1/chat/completions")
+    print(f"💡 Run with: GUIDANCE_BACKEND=llm LLM_API_URL=http://localhost:{args.port}/v1/chat/completions")
+    ThreadingHTTPServer(('0.0.0.0', args.port), StubLLMHandler).serve_forever()
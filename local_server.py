@@ -1,8 +1,8 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 import json
 import uuid
 from datetime import datetime
-from lambda_function import lambda_handler
+from lambda_function import lambda_handler, get_api_key, verify_api_key, profiler, stream_guidance_events, format_sse
 
 app = Flask(__name__)
 
@@ -22,6 +22,7 @@ def process_homework():
     else:
         event = {
             'httpMethod': 'POST',
+            'headers': dict(request.headers),
             'body': json.dumps(request.get_json() if request.is_json else {}),
             'requestContext': {'requestId': f'local-{uuid.uuid4()}'}
         }
@@ -39,6 +40,70 @@ def process_homework():
     
     return flask_response
 
+@app.route('/process-homework/stream', methods=['POST', 'OPTIONS'])
+def process_homework_stream():
+    """Progressive hints as Server-Sent Events."""
+    if request.method == 'OPTIONS':
+        response = lambda_handler({'httpMethod': 'OPTIONS'}, None)
+        flask_response = jsonify(json.loads(response['body']))
+        for header, value in response.get('headers', {}).items():
+            flask_response.headers[header] = value
+        return flask_response
+    
+    headers = dict(request.headers)
+    is_valid, message, user_info = verify_api_key({'headers': headers})
+    if not is_valid:
+        return jsonify({'error': 'Authentication Required', 'message': message}), 401
+    
+    request_data = request.get_json(silent=True) or {}
+    problem_text = str(request_data.get('problem_text', '')).strip()
+    if not problem_text:
+        return jsonify({
+            'error': 'Missing problem_text field',
+            'example': {'problem_text': '25 + 17'}
+        }), 400
+    
+    def generate():
+        for event_name, data in stream_guidance_events(problem_text, user_info, api_key=get_api_key(headers)):
+            yield format_sse(event_name, data)
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+        'Access-Control-Allow-Origin': '*'
+    })
+
+@app.route('/admin/profiling', methods=['GET', 'POST'])
+def admin_profiling():
+    """Start/stop the sampling profiler and fetch its report (admin role only)."""
+    is_valid, message, user_info = verify_api_key({'headers': dict(request.headers)})
+    if not is_valid:
+        return jsonify({'error': 'Authentication Required', 'message': message}), 401
+    if user_info.get('role') != 'admin':
+        return jsonify({'error': 'Forbidden', 'message': 'Admin API key required'}), 403
+    
+    if request.method == 'GET':
+        return jsonify(profiler.report())
+    
+    command = request.get_json(silent=True) or {}
+    action = command.get('action')
+    if action == 'start':
+        try:
+            every_n = int(command.get('every_n', 1))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'every_n must be a whole number', 'example': {'action': 'start', 'every_n': 10}}), 400
+        profiler.start(every_n)
+        return jsonify(profiler.report())
+    if action == 'stop':
+        return jsonify(profiler.stop())
+    if action == 'dump':
+        return jsonify(profiler.dump())
+    return jsonify({
+        'error': 'Unknown action',
+        'supported_actions': ['start', 'stop', 'dump'],
+        'example': {'action': 'start', 'every_n': 10}
+    }), 400
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint."""
@@ -54,4 +119,6 @@ if __name__ == '__main__':
     print("📚 Access API at: http://localhost:5000")
     print("🔍 Health check: http://localhost:5000/health")
     print("💡 Main endpoint: http://localhost:5000/process-homework")
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    print("📡 Streaming hints: http://localhost:5000/process-homework/stream")
+    # Threaded so identical classroom bursts can be coalesced in lambda_handler
+    app.run(debug=True, host='0.0.0.0', port=5000, threaded=True)
\ No newline at end of file
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# lambda_function.py and the helper scripts live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Keep test runs from writing a progress database to the temp directory
+os.environ.setdefault('PROGRESS_TRACKING', 'off')
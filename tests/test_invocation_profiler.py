@@ -0,0 +1,51 @@
+import tracemalloc
+
+from lambda_function import InvocationProfiler
+
+
+def make_profiled(profiler):
+    traced = []
+
+    @profiler
+    def handler(event, context):
+        traced.append(tracemalloc.is_tracing())
+        return [bytearray(1024) for _ in range(10)]
+
+    return handler, traced
+
+
+def test_only_sampled_invocations_are_traced(tmp_path):
+    profiler = InvocationProfiler(every_n=3, dump_every=100, sink_dir=str(tmp_path))
+    handler, traced = make_profiled(profiler)
+
+    for _ in range(9):
+        handler({}, None)
+
+    assert traced == [False, False, True] * 3
+    assert not tracemalloc.is_tracing()
+    report = profiler.report()
+    assert report['invocations'] == 9
+    assert report['profiled'] == 3
+    assert report['top_functions']
+    assert any(entry['location'].startswith('test_invocation_profiler.py') for entry in report['top_allocations'])
+
+
+def test_disabled_profiler_does_nothing(tmp_path):
+    profiler = InvocationProfiler(every_n=0, sink_dir=str(tmp_path))
+    handler, traced = make_profiled(profiler)
+    handler({}, None)
+
+    assert traced == [False]
+    assert profiler.report()['profiled'] == 0
+
+
+def test_stop_dumps_pstats_and_json(tmp_path):
+    profiler = InvocationProfiler(every_n=1, dump_every=100, sink_dir=str(tmp_path))
+    handler, _ = make_profiled(profiler)
+    handler({}, None)
+
+    report = profiler.stop()
+
+    assert not profiler.enabled
+    assert (tmp_path / (report['dumped_to'].split('/')[-1] + '.pstats')).exists()
+    assert (tmp_path / (report['dumped_to'].split('/')[-1] + '.json')).exists()
@@ -0,0 +1,192 @@
+import json
+import threading
+import time
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from lambda_function import GuidanceBackend, LLMGuidanceBackend, MathProblemSolver, WordProblemTemplateCache
+from llm_stub_server import StubLLMHandler
+
+WORD_PROBLEM = "Sarah has 20 candies and gives 5 to Tom. How many are left?"
+STUB_FIRST_STEP = "Read the story carefully and find the two numbers"
+
+
+@pytest.fixture
+def stub():
+    """Stub LLM on a free port; tests script it through the handler class attributes."""
+    class Handler(StubLLMHandler):
+        delays = []
+        requests = 0
+        connections = 0
+        bad_numbers = False
+        reply = None
+        lock = threading.Lock()
+
+        def setup(self):
+            super().setup()
+            with Handler.lock:
+                Handler.connections += 1
+
+        def response_delay(self):
+            with Handler.lock:
+                Handler.requests += 1
+                return Handler.delays.pop(0) if Handler.delays else 0.0
+
+        def guidance_for(self, problem_text):
+            if Handler.reply is not None:
+                return Handler.reply
+            guidance = super().guidance_for(problem_text)
+            if Handler.bad_numbers:
+                guidance['numbers'] = [37, 4]
+            return guidance
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    Handler.url = f'http://127.0.0.1:{server.server_address[1]}/v1/chat/completions'
+    yield Handler
+    server.shutdown()
+    server.server_close()
+
+
+def make_backend(url, deadline=2.0, hedge_delay=0.5):
+    return LLMGuidanceBackend(api_url=url, api_key='test', deadline=deadline, hedge_delay=hedge_delay,
+                              template_cache=WordProblemTemplateCache())
+
+
+def test_guidance_backend_is_abstract():
+    with pytest.raises(TypeError):
+        GuidanceBackend()
+
+
+def test_word_problems_use_llm_over_one_pooled_connection(stub):
+    backend = make_backend(stub.url)
+    problems = [
+        (WORD_PROBLEM, 'subtraction', [20, 5]),
+        ("There are 4 rows of 6 chairs", 'multiplication', [4, 6]),
+        ("Share 12 cookies between 3 friends", 'division', [12, 3])
+    ]
+    for problem_text, expected_operation, expected_numbers in problems:
+        operation, numbers, hints = backend.generate_guidance(MathProblemSolver(), problem_text)
+        assert (operation, numbers) == (expected_operation, expected_numbers)
+        assert hints['steps'][0] == STUB_FIRST_STEP
+
+    assert stub.requests == 3
+    assert stub.connections == 1
+
+
+def test_same_template_is_answered_from_cache(stub):
+    backend = make_backend(stub.url)
+    backend.generate_guidance(
+        MathProblemSolver(), "On Monday Sarah has 20 candies and gives 5 to Tom. How many are left?"
+    )
+    operation, numbers, hints = backend.generate_guidance(
+        MathProblemSolver(), "On Friday Ali has 18 marbles and gives 4 to Mia. How many are left?"
+    )
+
+    assert stub.requests == 1
+    assert (operation, numbers) == ('subtraction', [18, 4])
+    assert hints['difficulty'] == 'medium'
+    assert hints['steps'][:3] == [STUB_FIRST_STEP, "Start with 18", "Subtract 4"]
+    assert '20' not in json.dumps(hints)
+
+
+def test_guidance_with_derived_numbers_is_not_cached():
+    cache = WordProblemTemplateCache()
+    template, slots = cache.canonicalize("Bo has 3 apples and gets 4 more. How many in total?")
+    cache.store(template, slots, {'operation': 'addition', 'numbers': [3, 4], 'steps': ["3 and 4 make 7"]})
+    assert cache.lookup(template, slots) is None
+
+
+def test_canonicalize_keeps_function_words_and_keywords():
+    cache = WordProblemTemplateCache()
+    template, slots = cache.canonicalize("The teacher gives 5 apples to Tom")
+    assert template == "the teacher gives {n} {w} to {w}"
+    assert slots == ['5', 'apples', 'Tom']
+
+
+@pytest.mark.parametrize('first, second', [
+    ("Tom had 12 apples. Lost 3 today. How many now?", "Tom had 12 apples. Found 3 today. How many now?"),
+    ("Ate 6 after dinner", "Baked 6 after dinner"),
+    ("Mia had 9 cookies and ate 4 after lunch", "Mia had 9 cookies and ate 4 before lunch")
+])
+def test_problems_with_different_meanings_do_not_share_a_template(first, second):
+    cache = WordProblemTemplateCache()
+    assert cache.canonicalize(first)[0] != cache.canonicalize(second)[0]
+
+
+def test_symbolic_problem_short_circuits(stub):
+    operation, numbers, _ = make_backend(stub.url).generate_guidance(MathProblemSolver(), "7 × 8")
+    assert (operation, numbers) == ('multiplication', [7, 8])
+    assert stub.requests == 0
+
+
+def test_slow_first_request_is_hedged(stub):
+    stub.delays = [1.5, 0.0]
+    start = time.perf_counter()
+    _, _, hints = make_backend(stub.url, deadline=2.0, hedge_delay=0.1).generate_guidance(
+        MathProblemSolver(), WORD_PROBLEM
+    )
+
+    assert hints['steps'][0] == STUB_FIRST_STEP
+    assert time.perf_counter() - start < 1.0
+    assert stub.requests == 2
+
+
+def test_missed_deadline_falls_back_to_rules(stub):
+    stub.delays = [1.0, 1.0]
+    start = time.perf_counter()
+    operation, numbers, hints = make_backend(stub.url, deadline=0.2, hedge_delay=0.05).generate_guidance(
+        MathProblemSolver(), WORD_PROBLEM
+    )
+
+    assert time.perf_counter() - start < 0.8
+    assert (operation, numbers) == ('subtraction', [20, 5])
+    assert hints['steps'][0] != STUB_FIRST_STEP
+
+
+def test_error_status_retries_then_falls_back(stub):
+    stub.fail_rate = 1.0
+    _, _, hints = make_backend(stub.url).generate_guidance(MathProblemSolver(), WORD_PROBLEM)
+
+    assert hints['steps'][0] != STUB_FIRST_STEP
+    assert stub.requests == 2
+
+
+def test_operands_not_in_problem_fall_back(stub):
+    stub.bad_numbers = True
+    operation, numbers, hints = make_backend(stub.url).generate_guidance(MathProblemSolver(), WORD_PROBLEM)
+
+    assert numbers == [20, 5]
+    assert hints['steps'][0] != STUB_FIRST_STEP
+
+
+@pytest.mark.parametrize('reply', [
+    ['subtraction', 20, 5],
+    "Start with 20 and take away 5",
+    {'operation': ['subtraction'], 'numbers': [20, 5], 'steps': ["Start with 20"]}
+])
+def test_malformed_reply_falls_back(stub, reply):
+    stub.reply = reply
+    operation, numbers, hints = make_backend(stub.url).generate_guidance(MathProblemSolver(), WORD_PROBLEM)
+
+    assert (operation, numbers) == ('subtraction', [20, 5])
+    assert hints['steps'][0] != STUB_FIRST_STEP
+    assert stub.requests == 2
+
+
+def test_unreachable_llm_falls_back():
+    operation, numbers, _ = make_backend('http://127.0.0.1:1/v1/chat/completions').generate_guidance(
+        MathProblemSolver(), WORD_PROBLEM
+    )
+    assert (operation, numbers) == ('subtraction', [20, 5])
+
+
+def test_warm_opens_a_pooled_connection(stub):
+    backend = make_backend(stub.url)
+    backend.warm()
+    backend.generate_guidance(MathProblemSolver(), WORD_PROBLEM)
+
+    assert stub.connections == 1
+    assert stub.requests == 1
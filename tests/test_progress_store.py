@@ -0,0 +1,163 @@
+import json
+import sqlite3
+import threading
+
+import pytest
+
+import lambda_function
+from lambda_function import MathProblemSolver, PrebuiltResponseTable, ProgressStore, solve_problem
+
+KEY = 'kid_learning_gamma_2025'
+
+
+@pytest.fixture
+def store(tmp_path):
+    # A long interval so tests decide when flushes happen
+    progress_store = ProgressStore(str(tmp_path / 'progress.db'), flush_interval=3600, flush_batch=10_000)
+    yield progress_store
+    progress_store.close()
+
+
+class FailOnceConnection:
+    """Delegates to a real connection but fails the first executemany."""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.failed = False
+
+    def executemany(self, *args):
+        if not self.failed:
+            self.failed = True
+            raise sqlite3.OperationalError('disk I/O error')
+        return self.connection.executemany(*args)
+
+    def __getattr__(self, name):
+        return getattr(self.connection, name)
+
+
+def flushed_rows(path):
+    with sqlite3.connect(path) as connection:
+        return connection.execute(
+            'SELECT operation, difficulty, attempts, struggles FROM progress ORDER BY operation'
+        ).fetchall()
+
+
+def test_history_includes_buffered_and_flushed_attempts(store):
+    store.record(KEY, 'addition', 'easy', True)
+    store.flush()
+    store.record(KEY, 'addition', 'easy', False)
+
+    fresh = ProgressStore(store.path, flush_interval=3600)
+    try:
+        assert fresh.history(KEY) == {('addition', 'easy'): (1, 0)}
+    finally:
+        fresh.close()
+    assert store.history(KEY) == {('addition', 'easy'): (2, 1)}
+
+
+def test_failed_flush_rolls_back_and_keeps_the_batch(store):
+    store.record(KEY, 'subtraction', 'unknown', False)
+    store._db = FailOnceConnection(store._db)
+
+    with pytest.raises(sqlite3.OperationalError):
+        store.flush()
+    assert not store._db.in_transaction
+
+    store.record(KEY, 'subtraction', 'unknown', False)
+    assert store.flush() == 1
+    assert flushed_rows(store.path) == [('subtraction', 'unknown', 2, 2)]
+
+
+def test_close_flushes_buffered_attempts(tmp_path):
+    path = str(tmp_path / 'progress.db')
+    progress_store = ProgressStore(path, flush_interval=3600)
+    progress_store.record(KEY, 'multiplication', 'hard', True)
+    progress_store.close()
+
+    assert flushed_rows(path) == [('multiplication', 'hard', 1, 0)]
+
+
+def test_concurrent_records_and_flushes_are_not_lost(store):
+    def worker():
+        for _ in range(200):
+            store.record(KEY, 'division', 'medium', True)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for _ in range(20):
+        store.flush()
+        store._cache.clear()
+        store.history(KEY)
+    for thread in threads:
+        thread.join()
+
+    assert store.history(KEY) == {('division', 'medium'): (800, 0)}
+    store.flush()
+    assert flushed_rows(store.path) == [('division', 'medium', 800, 0)]
+
+
+def test_history_does_not_wait_for_a_flush_or_compaction(store):
+    store.record(KEY, 'addition', 'easy', True)
+    store.flush()
+    store.record(KEY, 'addition', 'hard', False)
+    store._cache.clear()
+
+    # flush() and compact() hold the writer's lock for the whole disk write
+    with store._db_lock:
+        result = []
+        reader = threading.Thread(target=lambda: result.append(store.history(KEY)))
+        reader.start()
+        reader.join(timeout=2)
+        assert result == [{('addition', 'easy'): (1, 0), ('addition', 'hard'): (1, 1)}]
+
+
+@pytest.fixture
+def tracking(monkeypatch, store):
+    """Route solve_problem's progress tracking to the test store."""
+    monkeypatch.setattr(lambda_function, 'PROGRESS_TRACKING', True)
+    monkeypatch.setattr(lambda_function, '_progress_store', store)
+    monkeypatch.setattr(lambda_function, '_response_table_loaded', True)
+    monkeypatch.setattr(lambda_function, '_response_table', None)
+    return store
+
+
+# The sixth easy attempt and the third failed one are the first with enough history for a hint
+@pytest.mark.parametrize('problem_text, attempts, expected_history', [
+    ('7 + 5', 6, {('addition', 'easy'): (6, 0)}),
+    ('5 - 9', 3, {('subtraction', 'easy'): (3, 3)}),
+    ('8 / 0', 3, {('division', 'medium'): (3, 3)})
+])
+def test_table_responses_carry_the_adaptive_hint(tmp_path, monkeypatch, tracking, problem_text, attempts,
+                                                 expected_history):
+    table_path = str(tmp_path / 'response_table.bin')
+    PrebuiltResponseTable.build(table_path, max_operand=12)
+    user_info = {'role': 'teacher'}
+
+    responses = {}
+    for key, table in (('table', PrebuiltResponseTable(table_path)), ('pipeline', None)):
+        monkeypatch.setattr(lambda_function, '_response_table', table)
+        for _ in range(attempts):
+            body, _, _, from_table = solve_problem(problem_text, user_info, f'{key}_student_key_2025')
+        assert from_table == (table is not None)
+        responses[key] = json.loads(body)
+        responses[key].pop('timestamp')
+
+    assert 'adaptive_hint' in responses['table']
+    assert responses['table'] == responses['pipeline']
+    assert tracking.history('table_student_key_2025') == expected_history
+
+
+def test_failed_attempts_are_recorded_under_their_difficulty(tracking):
+    for problem_text in ['30 - 45'] * 3 + ['12 - 4'] * 3:
+        solve_problem(problem_text, {'role': 'student'}, KEY)
+
+    assert tracking.history(KEY) == {('subtraction', 'medium'): (6, 3)}
+
+
+def test_struggle_hint_fits_the_error():
+    solver = MathProblemSolver()
+    history = {('subtraction', 'easy'): (2, 2), ('division', 'medium'): (2, 2)}
+
+    assert 'order of your numbers' in solver.get_adaptive_hint('subtraction', 'easy', history)
+    assert 'divide by zero' in solver.get_adaptive_hint('division', 'medium', history)
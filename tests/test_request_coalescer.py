@@ -0,0 +1,94 @@
+import threading
+import time
+
+import pytest
+
+from lambda_function import RequestCoalescer
+
+
+def run_concurrently(coalescer, key, compute, count):
+    results, errors = [], []
+    start = threading.Barrier(count)
+
+    def worker():
+        start.wait()
+        try:
+            results.append(coalescer.run(key, compute))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+def test_followers_share_leader_result():
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return {'answer': 'shared'}
+
+    results, errors = run_concurrently(RequestCoalescer(timeout=2.0), 'key', compute, 10)
+
+    assert not errors
+    assert len(calls) == 1
+    assert all(result == {'answer': 'shared'} for result, _ in results)
+    assert sorted(shared for _, shared in results) == [False] + [True] * 9
+
+
+def test_different_keys_do_not_coalesce():
+    coalescer = RequestCoalescer(timeout=1.0)
+    assert coalescer.run('a', lambda: 1) == (1, False)
+    assert coalescer.run('b', lambda: 2) == (2, False)
+
+
+def test_slow_leader_promotes_a_single_follower():
+    calls = []
+    lock = threading.Lock()
+
+    def compute():
+        with lock:
+            calls.append(1)
+            first = len(calls) == 1
+        # Only the original leader is slow
+        time.sleep(1.0 if first else 0.05)
+        return 'done'
+
+    results, errors = run_concurrently(RequestCoalescer(timeout=0.2), 'key', compute, 10)
+
+    assert not errors
+    assert len(results) == 10
+    assert len(calls) == 2
+
+
+def test_failed_leader_hands_over_to_follower():
+    calls = []
+    lock = threading.Lock()
+
+    def compute():
+        with lock:
+            calls.append(1)
+            first = len(calls) == 1
+        time.sleep(0.1)
+        if first:
+            raise RuntimeError('leader failed')
+        return 'recovered'
+
+    results, errors = run_concurrently(RequestCoalescer(timeout=2.0), 'key', compute, 8)
+
+    assert len(errors) == 1 and str(errors[0]) == 'leader failed'
+    assert [result for result, _ in results] == ['recovered'] * 7
+    assert len(calls) == 2
+
+
+def test_leader_error_propagates_when_alone():
+    def compute():
+        raise ValueError('boom')
+
+    with pytest.raises(ValueError):
+        RequestCoalescer().run('key', compute)
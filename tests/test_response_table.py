@@ -0,0 +1,86 @@
+import json
+
+import pytest
+
+import lambda_function
+from lambda_function import PrebuiltResponseTable, get_response_table, process_problem
+
+MAX_OPERAND = 6
+SYMBOLS = {'addition': '+', 'subtraction': '-', 'multiplication': '×', 'division': '/'}
+ROLES = ['student', 'teacher', 'parent', 'demo', 'admin']
+
+
+@pytest.fixture(scope='module')
+def table_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('table') / 'response_table.bin')
+    PrebuiltResponseTable.build(path, max_operand=MAX_OPERAND)
+    return path
+
+
+@pytest.fixture
+def table(table_path):
+    return PrebuiltResponseTable(table_path)
+
+
+def without_timestamp(response):
+    response.pop('timestamp')
+    return response
+
+
+@pytest.mark.parametrize('operation', PrebuiltResponseTable.OPERATIONS)
+@pytest.mark.parametrize('role', ROLES)
+def test_bodies_match_the_pipeline(table, operation, role):
+    failures = 0
+    for num1 in range(MAX_OPERAND + 1):
+        for num2 in range(MAX_OPERAND + 1):
+            problem_text = f"{num1} {SYMBOLS[operation]} {num2}"
+            expected = without_timestamp(process_problem(problem_text, {'role': role}))
+            body = table.lookup(operation, [num1, num2], role, problem_text)
+
+            assert without_timestamp(json.loads(body)) == expected
+            assert table.succeeded(operation, [num1, num2]) is expected['success']
+            failures += not expected['success']
+
+    # Subtraction below zero and division by zero render error bodies, which carry no notes
+    assert failures == {'subtraction': 21, 'division': 7}.get(operation, 0)
+
+
+@pytest.mark.parametrize('problem', [('subtraction', [6, 2]), ('subtraction', [2, 6]), ('division', [4, 0])])
+def test_adaptive_hint_is_the_last_key(table, problem):
+    operation, numbers = problem
+    body = table.lookup(operation, numbers, 'teacher', 'problem', adaptive_hint="Try a harder one — next!")
+    response = json.loads(body)
+
+    assert list(response)[-1] == 'adaptive_hint'
+    assert response['adaptive_hint'] == "Try a harder one — next!"
+    assert 'adaptive_hint' not in json.loads(table.lookup(operation, numbers, 'teacher', 'problem'))
+
+
+@pytest.mark.parametrize('operation, numbers', [
+    ('addition', [MAX_OPERAND + 1, 1]),
+    ('addition', [1, MAX_OPERAND + 1]),
+    ('subtraction', [-1, 2]),
+    ('multiplication', [1, 2, 3]),
+    ('unknown', [1, 2])
+])
+def test_problems_outside_the_table_are_not_served(table, operation, numbers):
+    assert table.lookup(operation, numbers, 'student', 'problem') is None
+    assert table.succeeded(operation, numbers) is None
+
+
+@pytest.mark.parametrize('offset, patch', [(0, b'NOTATABL'), (8, b'\xff' * 16)])
+def test_wrong_magic_or_stale_fingerprint_is_ignored(tmp_path, monkeypatch, table_path, offset, patch):
+    with open(table_path, 'rb') as table_file:
+        data = bytearray(table_file.read())
+    data[offset:offset + len(patch)] = patch
+    broken_path = tmp_path / 'response_table.bin'
+    broken_path.write_bytes(bytes(data))
+
+    monkeypatch.setattr(lambda_function, 'RESPONSE_TABLE_PATH', str(broken_path))
+    monkeypatch.setattr(lambda_function, '_response_table', None)
+    monkeypatch.setattr(lambda_function, '_response_table_loaded', False)
+    assert get_response_table() is None
+
+    monkeypatch.setattr(lambda_function, 'RESPONSE_TABLE_PATH', table_path)
+    monkeypatch.setattr(lambda_function, '_response_table_loaded', False)
+    assert get_response_table() is not None
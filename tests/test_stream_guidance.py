@@ -0,0 +1,77 @@
+import lambda_function
+from lambda_function import (
+    GuidanceBackend, MathProblemSolver, ProgressStore, RuleBasedGuidanceBackend, stream_guidance_events
+)
+
+WORD_PROBLEM = "Sarah has 20 candies and gives 5 to Tom. How many are left?"
+
+
+class SlowTutorBackend(GuidanceBackend):
+    """Stands in for the LLM: reclassifies the problem and writes its own steps."""
+
+    name = 'tutor'
+
+    def __init__(self):
+        self.calls = 0
+
+    def generate_guidance(self, solver, problem_text):
+        self.calls += 1
+        hints = solver.generate_educational_hint('addition', [20, 5])
+        hints['steps'] = ["Find the two amounts in the story", "Put them together"]
+        return 'addition', [20, 5], hints
+
+
+def test_first_hint_follows_operation_and_classification_runs_once(monkeypatch):
+    calls = []
+    original = MathProblemSolver.identify_operation
+
+    def counting_identify(self, text):
+        calls.append(text)
+        return original(self, text)
+
+    monkeypatch.setattr(MathProblemSolver, 'identify_operation', counting_identify)
+    events = list(stream_guidance_events(WORD_PROBLEM, {'role': 'student'}, RuleBasedGuidanceBackend()))
+    names = [name for name, _ in events]
+
+    assert len(calls) == 1
+    assert names[:2] == ['operation', 'hint']
+    assert names[-3:] == ['abacus_tip', 'mental_math_trick', 'complete']
+    steps = [data for name, data in events if name == 'hint']
+    assert [step['step'] for step in steps] == list(range(1, len(steps) + 1))
+    assert [step['hint'] for step in steps] == events[-1][1]['educational_guidance']['step_by_step_hints']
+
+
+def test_slower_backend_corrects_operation_and_replaces_hints():
+    backend = SlowTutorBackend()
+    events = list(stream_guidance_events(WORD_PROBLEM, {'role': 'student'}, backend))
+
+    assert backend.calls == 1
+    assert events[0] == ('operation', {'operation': 'subtraction', 'numbers': [20, 5]})
+    assert events[1][0] == 'hint' and events[1][1]['step'] == 1
+    assert events[2] == ('operation', {'operation': 'addition', 'numbers': [20, 5], 'corrected': True})
+    assert [data['hint'] for name, data in events[3:5]] == ["Find the two amounts in the story", "Put them together"]
+
+    complete = events[-1][1]
+    assert complete['analysis']['operation_identified'] == 'addition'
+    assert complete['educational_guidance']['step_by_step_hints'] == ["Find the two amounts in the story", "Put them together"]
+
+
+def test_error_problem_sends_no_hints():
+    events = list(stream_guidance_events("5 - 9", {'role': 'student'}, RuleBasedGuidanceBackend()))
+    assert [name for name, _ in events] == ['operation', 'complete']
+    assert events[-1][1]['success'] is False
+
+
+def test_complete_event_records_progress_and_carries_adaptive_hint(tmp_path, monkeypatch):
+    store = ProgressStore(str(tmp_path / 'progress.db'), flush_interval=3600)
+    monkeypatch.setattr(lambda_function, 'PROGRESS_TRACKING', True)
+    monkeypatch.setattr(lambda_function, '_progress_store', store)
+    try:
+        for _ in range(3):
+            events = list(stream_guidance_events("5 - 9", {'role': 'student'}, RuleBasedGuidanceBackend(),
+                                                 api_key='kid_learning_gamma_2025'))
+
+        assert store.history('kid_learning_gamma_2025') == {('subtraction', 'easy'): (3, 3)}
+        assert 'order of your numbers' in events[-1][1]['adaptive_hint']
+    finally:
+        store.close()
@@ -0,0 +1,25 @@
+import json
+
+import lambda_function
+from lambda_function import lambda_handler
+
+
+def test_warmup_event_skips_auth_and_reports_timing():
+    response = lambda_handler({'warmup': True}, None)
+
+    assert response['statusCode'] == 200
+    report = json.loads(response['body'])
+    assert report['warmup'] is True
+    assert report['module_init_ms'] > 0
+    assert report['warmup_ms'] > 0
+    assert report['operations_warmed'] == list(lambda_function.MathProblemSolver.OPERATIONS)
+
+
+def test_scheduled_event_is_a_warmup():
+    response = lambda_handler({'source': 'aws.events', 'detail-type': 'Scheduled Event'}, None)
+    assert json.loads(response['body'])['warmup'] is True
+
+
+def test_api_gateway_event_cannot_trigger_warmup():
+    response = lambda_handler({'httpMethod': 'POST', 'warmup': True, 'headers': {}}, None)
+    assert response['statusCode'] == 401
@@ -0,0 +1,66 @@
+import os
+import subprocess
+import sys
+from collections import Counter
+
+import pytest
+
+import worksheet_generator
+from lambda_function import MathProblemSolver
+from worksheet_generator import generate_worksheet
+
+
+@pytest.fixture(params=['numpy', 'python'])
+def synthesizer(request, monkeypatch):
+    """Run each test against the NumPy path (when installed) and the pure-Python fallback."""
+    if request.param == 'numpy':
+        if worksheet_generator.np is None:
+            pytest.skip('NumPy is not installed')
+    else:
+        monkeypatch.setattr(worksheet_generator, 'np', None)
+    return request.param
+
+
+def test_exact_division_has_varied_quotients(synthesizer):
+    problems = list(generate_worksheet('division', 'medium', 2000, exact_division=True, seed=7))
+
+    assert len(problems) == 2000
+    for problem in problems:
+        num1, num2 = problem['numbers']
+        assert num1 % num2 == 0 and num1 // num2 >= 2 and num2 >= 2
+        assert num1 <= 1000
+    assert len(Counter(num1 // num2 for num1, num2 in (p['numbers'] for p in problems))) > 50
+
+
+def test_division_never_puts_the_smaller_number_first(synthesizer):
+    problems = list(generate_worksheet('division', 'medium', 2000, seed=7))
+
+    assert all(num1 >= num2 > 0 for num1, num2 in (p['numbers'] for p in problems))
+
+
+@pytest.mark.parametrize('operation', ['addition', 'subtraction', 'multiplication'])
+@pytest.mark.parametrize('difficulty', ['easy', 'medium', 'hard'])
+def test_problems_match_the_requested_difficulty(synthesizer, operation, difficulty):
+    solver = MathProblemSolver()
+    for problem in generate_worksheet(operation, difficulty, 300, seed=3):
+        num1, num2 = problem['numbers']
+        assert solver._assess_difficulty(num1, num2, operation) == difficulty
+
+
+def test_invalid_arguments_raise_before_iteration():
+    with pytest.raises(ValueError):
+        generate_worksheet('division', 'hard', 10)
+    with pytest.raises(ValueError):
+        generate_worksheet('division', 'medium', 10, exact_division=True, max_operand=3)
+
+
+def test_cli_rejects_invalid_band_without_creating_output(tmp_path):
+    output = tmp_path / 'worksheet.jsonl'
+    result = subprocess.run(
+        [sys.executable, 'worksheet_generator.py', 'division', 'hard', '--output', str(output)],
+        cwd=os.path.dirname(os.path.abspath(worksheet_generator.__file__)), capture_output=True, text=True
+    )
+
+    assert result.returncode == 2
+    assert 'medium' in result.stderr
+    assert not output.exists()
@@ -0,0 +1,207 @@
+# Bulk practice-worksheet generator for teachers
+# Synthesizes problems for one operation and difficulty band, then streams them with their hints
+
+import argparse
+import json
+import math
+import random
+import sys
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from lambda_function import MathProblemSolver
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+OPERATION_SYMBOLS = {
+    'addition': '+',
+    'subtraction': '-',
+    'multiplication': '×',
+    'division': '÷'
+}
+
+def difficulty_band(operation: str, difficulty: str, user_role: str = 'student',
+                    max_operand: Optional[int] = None) -> Tuple[int, int]:
+    """
+    Inclusive range for the larger operand so _assess_difficulty rates the problem as requested.
+
+    Args:
+        operation (str): Type of math operation
+        difficulty (str): 'easy', 'medium' or 'hard'
+        user_role (str): Role whose operand limit (see extract_numbers) caps the band
+        max_operand (int): Optional tighter cap, e.g. 100 for younger students
+
+    Returns:
+        Tuple[int, int]: (lowest, highest) value of max(num1, num2)
+    """
+    if operation not in MathProblemSolver.OPERATIONS:
+        raise ValueError(f"Unknown operation '{operation}', expected one of {MathProblemSolver.OPERATIONS}")
+
+    limit = MathProblemSolver(user_role=user_role).max_number()
+    if max_operand is not None:
+        limit = min(limit, max_operand)
+
+    thresholds = MathProblemSolver.DIFFICULTY_THRESHOLDS.get(operation)
+    if thresholds is None:
+        # _assess_difficulty rates every division problem 'medium'
+        if difficulty != 'medium':
+            raise ValueError(f"{operation.capitalize()} problems only come in 'medium' difficulty")
+        bands = {'medium': (1, limit)}
+    else:
+        easy_max, medium_max = thresholds
+        bands = {
+            'easy': (0, easy_max),
+            'medium': (easy_max + 1, medium_max),
+            'hard': (medium_max + 1, limit)
+        }
+
+    if difficulty not in bands:
+        raise ValueError(f"Unknown difficulty '{difficulty}', expected one of {list(bands)}")
+
+    low, high = bands[difficulty]
+    high = min(high, limit)
+    if low > high:
+        raise ValueError(f"No {difficulty} {operation} problems fit under an operand limit of {limit}")
+    return low, high
+
+def _divisor_limit(high: int) -> int:
+    """Largest divisor for exact division, so every divisor leaves room for a quotient of at least 2."""
+    return math.isqrt(high)
+
+def _synthesize_numpy(rng, operation: str, low: int, high: int, size: int,
+                      exact_division: bool) -> Tuple[List[int], List[int]]:
+    """Draw a batch of operand pairs and keep those passing the rule masks."""
+    if operation == 'division' and exact_division:
+        # Draw divisor and quotient (both at least 2) and multiply, instead of
+        # rejecting almost every pair or drowning the sheet in N ÷ N and N ÷ 1
+        num2 = rng.integers(2, _divisor_limit(high) + 1, size)
+        num1 = num2 * rng.integers(2, high // num2 + 1)
+    else:
+        num1 = rng.integers(0, high + 1, size)
+        num2 = rng.integers(0, high + 1, size)
+
+    mask = np.maximum(num1, num2) >= low
+    if operation in ('subtraction', 'division'):
+        mask &= num1 >= num2
+    if operation == 'division':
+        mask &= num2 != 0
+
+    return num1[mask].tolist(), num2[mask].tolist()
+
+def _synthesize_python(rng: random.Random, operation: str, low: int, high: int, size: int,
+                       exact_division: bool) -> Tuple[List[int], List[int]]:
+    """Pure-Python fallback with the same rules when NumPy is not installed."""
+    kept1, kept2 = [], []
+    for _ in range(size):
+        if operation == 'division' and exact_division:
+            num2 = rng.randint(2, _divisor_limit(high))
+            num1 = num2 * rng.randint(2, high // num2)
+        else:
+            num1 = rng.randint(0, high)
+            num2 = rng.randint(0, high)
+
+        if max(num1, num2) < low:
+            continue
+        if operation in ('subtraction', 'division') and num1 < num2:
+            continue
+        if operation == 'division' and num2 == 0:
+            continue
+        kept1.append(num1)
+        kept2.append(num2)
+    return kept1, kept2
+
+def generate_operands(operation: str, low: int, high: int, count: int, exact_division: bool = False,
+                      seed: Optional[int] = None) -> Iterator[Tuple[List[int], List[int]]]:
+    """Yield batches of operand pairs until count pairs have been produced."""
+    if np is not None:
+        rng = np.random.default_rng(seed)
+        synthesize = _synthesize_numpy
+    else:
+        rng = random.Random(seed)
+        synthesize = _synthesize_python
+
+    remaining = count
+    while remaining > 0:
+        # Oversample so rejected pairs rarely need a second pass
+        size = min(max(int(remaining * 2.2), 1024), 1_000_000)
+        num1, num2 = synthesize(rng, operation, low, high, size, exact_division)
+        num1, num2 = num1[:remaining], num2[:remaining]
+        remaining -= len(num1)
+        if num1:
+            yield num1, num2
+
+def generate_worksheet(operation: str, difficulty: str, count: int, user_role: str = 'student',
+                       exact_division: bool = False, max_operand: Optional[int] = None,
+                       seed: Optional[int] = None) -> Iterator[Dict[str, any]]:
+    """
+    Generate practice problems with their hints.
+
+    Arguments are validated up front, so a bad band raises ValueError here
+    rather than on the first iteration.
+
+    Args:
+        operation (str): Type of math operation
+        difficulty (str): 'easy', 'medium' or 'hard' (division is always 'medium')
+        count (int): Number of problems
+        user_role (str): Role used for operand limits and hint customization
+        exact_division (bool): Only generate division problems without a remainder
+        max_operand (int): Optional cap on operand size
+        seed (int): Random seed for reproducible worksheets
+
+    Returns:
+        Iterator[Dict]: Problem text, operands, difficulty and educational hints
+    """
+    low, high = difficulty_band(operation, difficulty, user_role, max_operand)
+    if operation == 'division' and exact_division and _divisor_limit(high) < 2:
+        raise ValueError(f"No exact division problems fit under an operand limit of {high}")
+    return _worksheet_problems(operation, difficulty, count, user_role, exact_division, low, high, seed)
+
+def _worksheet_problems(operation: str, difficulty: str, count: int, user_role: str, exact_division: bool,
+                        low: int, high: int, seed: Optional[int]) -> Iterator[Dict[str, any]]:
+    """Lazily render the operand batches for generate_worksheet."""
+    solver = MathProblemSolver(user_role=user_role)
+    symbol = OPERATION_SYMBOLS[operation]
+
+    number = 0
+    for batch1, batch2 in generate_operands(operation, low, high, count, exact_division, seed):
+        for num1, num2 in zip(batch1, batch2):
+            number += 1
+            yield {
+                'number': number,
+                'problem_text': f"{num1} {symbol} {num2}",
+                'operation': operation,
+                'numbers': [num1, num2],
+                'difficulty': difficulty,
+                'hints': solver.generate_educational_hint(operation, [num1, num2])
+            }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate a practice worksheet with hints')
+    parser.add_argument('operation', choices=MathProblemSolver.OPERATIONS)
+    parser.add_argument('difficulty', choices=['easy', 'medium', 'hard'])
+    parser.add_argument('--count', type=int, default=20, help='Number of problems')
+    parser.add_argument('--role', default='student', help='Role for operand limits and hint customization')
+    parser.add_argument('--exact-division', action='store_true', help='Division without remainders only')
+    parser.add_argument('--max-operand', type=int, help='Cap operand size (e.g. 100)')
+    parser.add_argument('--seed', type=int, help='Random seed for a reproducible worksheet')
+    parser.add_argument('--format', choices=['jsonl', 'text'], default='jsonl',
+                        help='jsonl: one problem with hints per line; text: printable worksheet')
+    parser.add_argument('--output', help='File to write (default: stdout)')
+    args = parser.parse_args()
+
+    try:
+        problems = generate_worksheet(
+            args.operation, args.difficulty, args.count, args.role,
+            args.exact_division, args.max_operand, args.seed
+        )
+        output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+        with output:
+            for problem in problems:
+                if args.format == 'text':
+                    output.write(f"{problem['number']}. {problem['problem_text']} = ____\n")
+                else:
+                    output.write(json.dumps(problem, ensure_ascii=False) + '\n')
+    except ValueError as e:
+        parser.error(str(e))